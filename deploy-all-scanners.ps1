@@ -21,7 +21,7 @@ Write-Host ""
 
 # Array of scanners to deploy
 $scanners = @(
-    @{Name="ebs-scanner"; File="ebs_scanner.py"; Handler="ebs_scanner.lambda_handler"; Description="Scans for unattached EBS volumes"},
+    @{Name="ebs-scanner"; File=@("ebs_scanner.py", "volume_state.py"); Handler="ebs_scanner.lambda_handler"; Description="Scans for unattached EBS volumes"},
     @{Name="ec2-scanner"; File="ec2_scanner.py"; Handler="ec2_scanner.lambda_handler"; Description="Scans for idle EC2 instances"},
     @{Name="eip-scanner"; File="eip_scanner.py"; Handler="eip_scanner.lambda_handler"; Description="Scans for unattached Elastic IPs"},
     @{Name="snapshot-scanner"; File="snapshot_scanner.py"; Handler="snapshot_scanner.lambda_handler"; Description="Scans for old EBS snapshots"}
@@ -15,7 +15,9 @@ $endpoints = @(
     @{Name="get-latest"; File="get_latest.py"; Handler="get_latest.lambda_handler"; Description="Get latest scan results"},
     @{Name="get-scans"; File="get_scans.py"; Handler="get_scans.lambda_handler"; Description="Get scan history"},
     @{Name="get-summary"; File="get_summary.py"; Handler="get_summary.lambda_handler"; Description="Get summary statistics"},
-    @{Name="trigger-scan"; File="trigger_scan.py"; Handler="trigger_scan.lambda_handler"; Description="Trigger new scan"}
+    @{Name="trigger-scan"; File="trigger_scan.py"; Handler="trigger_scan.lambda_handler"; Description="Trigger new scan"},
+    @{Name="get-resource-history"; File="get_resource_history.py"; Handler="get_resource_history.lambda_handler"; Description="Get finding history for a resource"},
+    @{Name="get-tags"; File="get_tags.py"; Handler="get_tags.lambda_handler"; Description="Filter and roll up findings by tag"}
 )
 
 # Create deployment packages
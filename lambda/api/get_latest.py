@@ -1,11 +1,15 @@
 """
 API Endpoint: Get Latest Scan Results
 GET /api/latest
+GET /api/latest?severity=HIGH,MEDIUM&service=EBS&finding_type=...&min_cost=10&sort=monthly_cost_usd&order=desc&top=50
 """
 import boto3
 import json
 from decimal import Decimal
 
+from utils.findings_query import FILTER_PARAMS, parse_query, query_scan_findings
+from utils.scan_lookup import find_latest_scan_id
+
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table('cost-optimizer-scans')
 
@@ -26,11 +30,26 @@ def lambda_handler(event, context):
     }
     
     try:
-        # Scan table and get all items
-        response = table.scan()
-        items = response.get('Items', [])
+        # Findings query parameters switch the response to a flat findings list
+        query_params = event.get('queryStringParameters', {}) or {}
+        findings_query = None
+        if any(name in query_params for name in FILTER_PARAMS):
+            try:
+                findings_query = parse_query(query_params)
+            except ValueError as e:
+                return {
+                    'statusCode': 400,
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': False,
+                        'error': str(e)
+                    })
+                }
         
-        if not items:
+        # Follow the latest-scan pointer so old scans are never read
+        latest_scan_id = find_latest_scan_id(table)
+        
+        if not latest_scan_id:
             return {
                 'statusCode': 200,
                 'headers': headers,
@@ -43,12 +62,49 @@ def lambda_handler(event, context):
                 })
             }
         
-        # Sort by timestamp (most recent first)
-        items.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        latest_scan = items[0]
+        latest_key = {'scan_id': latest_scan_id}
+        
+        # detailed_results is by far the largest attribute, read it only when needed
+        latest_scan = table.get_item(
+            Key=latest_key,
+            ProjectionExpression='scan_id, #ts, #status, total_findings, monthly_savings, annual_savings, top_findings',
+            ExpressionAttributeNames={'#ts': 'timestamp', '#status': 'status'}
+        )['Item']
+        
+        def load_detailed_results():
+            item = table.get_item(Key=latest_key, ProjectionExpression='detailed_results').get('Item', {})
+            return item.get('detailed_results', [])
+        
+        summary = {
+            'total_findings': int(latest_scan.get('total_findings', 0)),
+            'monthly_savings_usd': float(latest_scan.get('monthly_savings', 0)),
+            'annual_savings_usd': float(latest_scan.get('annual_savings', 0))
+        }
+        
+        if findings_query:
+            findings, matched, source = query_scan_findings(latest_scan, findings_query, load_detailed_results)
+            result = {
+                'success': True,
+                'data': {
+                    'scan_id': latest_scan.get('scan_id'),
+                    'timestamp': latest_scan.get('timestamp'),
+                    'status': latest_scan.get('status'),
+                    'summary': summary,
+                    'query': {k: sorted(v) if isinstance(v, set) else v for k, v in findings_query.items()},
+                    'matched_count': matched,
+                    'returned_count': len(findings),
+                    'source': source,
+                    'findings': findings
+                }
+            }
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'body': json.dumps(result, default=decimal_to_float)
+            }
         
         # Parse detailed results if stored as JSON string
-        detailed_results = latest_scan.get('detailed_results', [])
+        detailed_results = load_detailed_results()
         if isinstance(detailed_results, str):
             try:
                 detailed_results = json.loads(detailed_results)
@@ -62,11 +118,17 @@ def lambda_handler(event, context):
                 'scan_id': latest_scan.get('scan_id'),
                 'timestamp': latest_scan.get('timestamp'),
                 'status': latest_scan.get('status'),
-                'summary': {
-                    'total_findings': int(latest_scan.get('total_findings', 0)),
-                    'monthly_savings_usd': float(latest_scan.get('monthly_savings', 0)),
-                    'annual_savings_usd': float(latest_scan.get('annual_savings', 0))
-                },
+                'summary': summary,
+                # When each scanner's result was produced (cached = reused from an earlier run)
+                'freshness': [
+                    {
+                        'service': r.get('service'),
+                        'finding_type': r.get('finding_type'),
+                        'scanned_at': r.get('scan_timestamp'),
+                        'cached': r.get('cached', False)
+                    }
+                    for r in detailed_results
+                ],
                 'detailed_results': detailed_results
             }
         }
@@ -0,0 +1,52 @@
+"""
+API Endpoint: Get Finding History for a Resource
+GET /api/resources/{resource_id}
+GET /api/resources?resource_id=vol-123
+"""
+import boto3
+from datetime import datetime
+
+from utils.helpers import create_success_response, create_error_response
+
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table('cost-optimizer-findings')
+
+def lambda_handler(event, context):
+    """Returns first/last seen, idle duration and cumulative cost for one resource"""
+
+    path_params = event.get('pathParameters', {}) or {}
+    query_params = event.get('queryStringParameters', {}) or {}
+    resource_id = path_params.get('resource_id') or query_params.get('resource_id')
+
+    if not resource_id or resource_id.startswith('__'):
+        return create_error_response(400, 'resource_id is required')
+
+    try:
+        # Single key lookup, no scan history replay
+        item = table.get_item(Key={'resource_id': resource_id}).get('Item')
+
+        if not item:
+            return create_error_response(404, f'No findings recorded for {resource_id}')
+
+        idle_since = item.get('idle_since', item.get('first_seen'))
+        last_seen = item.get('last_seen')
+        idle_days = (datetime.fromisoformat(last_seen) - datetime.fromisoformat(idle_since)).total_seconds() / 86400
+
+        return create_success_response({
+            'resource_id': resource_id,
+            'service': item.get('service'),
+            'finding_type': item.get('finding_type'),
+            'severity': item.get('severity'),
+            'first_seen': item.get('first_seen'),
+            'idle_since': idle_since,
+            'last_seen': last_seen,
+            'last_scan_id': item.get('last_scan_id'),
+            'idle_days': round(idle_days, 1),
+            'scan_count': int(item.get('scan_count', 0)),
+            'monthly_cost_usd': float(item.get('monthly_cost_usd', 0)),
+            'cumulative_cost_usd': round(float(item.get('cumulative_cost_usd', 0)), 2)
+        })
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return create_error_response(500, str(e))
@@ -6,6 +6,8 @@ import boto3
 import json
 from decimal import Decimal
 
+from utils.scan_lookup import scan_items
+
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table('cost-optimizer-scans')
 
@@ -31,9 +33,12 @@ def lambda_handler(event, context):
         limit = int(query_params.get('limit', 10))
         sort_order = query_params.get('sort', 'desc')
         
-        # Scan table
-        response = table.scan()
-        items = response.get('Items', [])
+        # Scan every page of the table, totals only (skips the latest-scan pointer)
+        items = scan_items(
+            table,
+            'scan_id, #ts, #status, total_findings, monthly_savings, annual_savings',
+            {'#ts': 'timestamp', '#status': 'status'}
+        )
         
         if not items:
             return {
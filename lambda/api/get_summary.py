@@ -3,10 +3,13 @@ API Endpoint: Get Summary Statistics
 GET /api/summary
 """
 import boto3
+from boto3.dynamodb.conditions import Attr
 import json
 from datetime import datetime, timedelta
 from decimal import Decimal
-from collections import defaultdict
+
+from utils.savings_forecast import load_series, scan_breakdown, analyze_history
+from utils.scan_lookup import find_latest_scan_id, scan_items, count_scans
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table('cost-optimizer-scans')
@@ -28,11 +31,10 @@ def lambda_handler(event, context):
     }
     
     try:
-        # Get all scans
-        response = table.scan()
-        items = response.get('Items', [])
+        # Latest scan through its pointer (totals only, detailed_results is read below)
+        latest_scan_id = find_latest_scan_id(table)
         
-        if not items:
+        if not latest_scan_id:
             return {
                 'statusCode': 200,
                 'headers': headers,
@@ -46,45 +48,41 @@ def lambda_handler(event, context):
                 })
             }
         
-        # Sort by timestamp
-        items.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        latest = items[0]
+        totals = 'scan_id, #ts, total_findings, monthly_savings, annual_savings, #status'
+        totals_names = {'#ts': 'timestamp', '#status': 'status'}
+        latest = table.get_item(
+            Key={'scan_id': latest_scan_id},
+            ProjectionExpression=totals,
+            ExpressionAttributeNames=totals_names
+        )['Item']
         
         # Calculate trends (last 7 days)
         seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-        recent_scans = [s for s in items if s.get('timestamp', '') >= seven_days_ago]
+        recent_scans = scan_items(table, totals, totals_names, Attr('timestamp').gte(seven_days_ago))
         
-        # Aggregate by service
+        # Per-service totals of the latest scan from the pre-aggregated history
         service_breakdown = []
+        series = []
         try:
-            detailed = latest.get('detailed_results')
-            if isinstance(detailed, str):
-                detailed = json.loads(detailed)
-            
-            if detailed and isinstance(detailed, list):
-                breakdown = defaultdict(lambda: {'findings': 0, 'savings': 0})
-                for result in detailed:
-                    service = result.get('service', 'Unknown')
-                    findings = result.get('total_findings', 0)
-                    savings = float(result.get('total_monthly_savings_usd', 0))
-                    breakdown[service]['findings'] += findings
-                    breakdown[service]['savings'] += savings
-                
-                service_breakdown = [
-                    {
-                        'service': service,
-                        'findings': data['findings'],
-                        'monthly_savings_usd': round(data['savings'], 2)
-                    }
-                    for service, data in breakdown.items()
-                ]
-        except:
-            pass
+            series = load_series(dynamodb)
+            service_breakdown = scan_breakdown(series, latest_scan_id)
+        except Exception as e:
+            print(f"Scan history unavailable: {str(e)}")
         
         # Calculate averages
         avg_monthly = sum(float(s.get('monthly_savings', 0)) for s in recent_scans) / len(recent_scans) if recent_scans else 0
         avg_findings = sum(int(s.get('total_findings', 0)) for s in recent_scans) / len(recent_scans) if recent_scans else 0
         
+        # Forecasts and anomalies from the pre-aggregated history
+        forecasts = []
+        anomalies = []
+        try:
+            analysis = analyze_history(series)
+            forecasts = analysis['forecasts']
+            anomalies = analysis['anomalies']
+        except Exception as e:
+            print(f"Forecasting skipped: {str(e)}")
+        
         # Generate insights
         insights = []
         total_findings = int(latest.get('total_findings', 0))
@@ -111,6 +109,31 @@ def lambda_handler(event, context):
                 'message': 'Great! No cost optimization issues detected'
             })
         
+        for anomaly in anomalies:
+            metric = 'findings' if anomaly['metric'] == 'findings' else 'monthly savings ($)'
+            service = 'total' if anomaly['service'] == 'ALL' else anomaly['service']
+            insights.append({
+                'type': 'ANOMALY',
+                'severity': 'HIGH' if anomaly['direction'] == 'spike' else 'LOW',
+                'message': (
+                    f"Unusual {anomaly['direction']} in {service} {metric} for account "
+                    f"{anomaly['account_id']}: {anomaly['change']:+} since the previous scan "
+                    f"(typically {anomaly['typical_change']:+})"
+                )
+            })
+        
+        for forecast in forecasts:
+            if forecast['service'] == 'ALL' and forecast['trend_usd_per_month'] > 0:
+                insights.append({
+                    'type': 'GROWING_WASTE',
+                    'severity': 'MEDIUM',
+                    'message': (
+                        f"Waste in account {forecast['account_id']} is growing by "
+                        f"${forecast['trend_usd_per_month']}/month; "
+                        f"${forecast['waste_next_90d_usd']} will accrue over the next 90 days"
+                    )
+                })
+        
         # Build summary
         summary = {
             'success': True,
@@ -124,12 +147,14 @@ def lambda_handler(event, context):
                     'status': latest.get('status')
                 },
                 'trends': {
-                    'total_scans': len(items),
+                    'total_scans': count_scans(table),
                     'scans_last_7_days': len(recent_scans),
                     'avg_monthly_savings': round(avg_monthly, 2),
                     'avg_findings_per_scan': round(avg_findings, 1)
                 },
                 'service_breakdown': service_breakdown,
+                'forecasts': forecasts,
+                'anomalies': anomalies,
                 'insights': insights
             }
         }
@@ -0,0 +1,107 @@
+"""
+API Endpoint: Tag Filtering and Cost-Allocation Rollups
+GET /api/tags                          tag keys present in the scan
+GET /api/tags?key=team                 savings rolled up by each value of a tag
+GET /api/tags?key=team&value=web       findings carrying team=web
+Optional: scan_id (defaults to the latest indexed scan), limit
+"""
+import boto3
+from boto3.dynamodb.conditions import Key
+
+from utils.helpers import create_success_response, create_error_response
+
+dynamodb = boto3.resource('dynamodb')
+table = dynamodb.Table('cost-optimizer-tag-index')
+
+def escape_tag_part(text):
+    """Escape sort key separators in a tag key or value (mirrors scanners/tag_index.py)"""
+    return text.replace('%', '%25').replace('=', '%3D').replace('#', '%23')
+
+def query_chunks(scan_id, prefix):
+    """Read all numbered chunk items for a sort key prefix"""
+    items = []
+    kwargs = {
+        'KeyConditionExpression': Key('scan_id').eq(scan_id) & Key('tag').begins_with(prefix)
+    }
+    while True:
+        response = table.query(**kwargs)
+        # Skip longer values sharing the prefix (e.g. web#2 when asking for web)
+        items.extend(
+            item for item in response.get('Items', [])
+            if len(item['tag']) == len(prefix) + 4
+        )
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def lambda_handler(event, context):
+    """Returns tag keys, per-value rollups or tag-filtered findings"""
+
+    query_params = event.get('queryStringParameters', {}) or {}
+    tag_key = query_params.get('key')
+    tag_value = query_params.get('value')
+
+    try:
+        limit = int(query_params.get('limit', 100))
+        scan_id = query_params.get('scan_id')
+        if not scan_id:
+            pointer = table.get_item(Key={'scan_id': 'LATEST', 'tag': 'pointer'}).get('Item')
+            if not pointer:
+                return create_success_response({'message': 'No tag index found', 'scan_id': None})
+            scan_id = pointer['latest_scan_id']
+
+        if not tag_key:
+            item = table.get_item(Key={'scan_id': scan_id, 'tag': '__keys__'}).get('Item', {})
+            keys = sorted(item.get('keys', []), key=lambda k: k['monthly_savings'], reverse=True)
+            return create_success_response({
+                'scan_id': scan_id,
+                'keys': [
+                    {
+                        'key': k['key'],
+                        'distinct_values': int(k['distinct_values']),
+                        'findings': int(k['findings']),
+                        'monthly_savings_usd': round(float(k['monthly_savings']), 2)
+                    }
+                    for k in keys
+                ]
+            })
+
+        if tag_value is None:
+            # Chunks are written in descending savings order
+            rows = []
+            for item in sorted(query_chunks(scan_id, f"key#{escape_tag_part(tag_key)}#"), key=lambda i: i['tag']):
+                rows.extend(item['values'])
+            return create_success_response({
+                'scan_id': scan_id,
+                'key': tag_key,
+                'total_values': len(rows),
+                'values': [
+                    {
+                        'value': row['value'],
+                        'findings': int(row['findings']),
+                        'monthly_savings_usd': round(float(row['monthly_savings']), 2),
+                        'annual_savings_usd': round(float(row['monthly_savings']) * 12, 2)
+                    }
+                    for row in rows[:limit]
+                ]
+            })
+
+        findings = []
+        for item in query_chunks(scan_id, f"tag#{escape_tag_part(tag_key)}={escape_tag_part(tag_value)}#"):
+            findings.extend(item['findings'])
+        findings.sort(key=lambda f: f['monthly_cost_usd'], reverse=True)
+        monthly_savings = float(sum(f['monthly_cost_usd'] for f in findings))
+
+        return create_success_response({
+            'scan_id': scan_id,
+            'key': tag_key,
+            'value': tag_value,
+            'total_findings': len(findings),
+            'monthly_savings_usd': round(monthly_savings, 2),
+            'annual_savings_usd': round(monthly_savings * 12, 2),
+            'findings': findings[:limit]
+        })
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return create_error_response(500, str(e))
@@ -19,9 +19,11 @@ def lambda_handler(event, context):
     
     try:
         # Invoke the master scanner asynchronously
+        # Manual scans run every scanner regardless of its schedule
         response = lambda_client.invoke(
             FunctionName='cost-optimizer-master',
-            InvocationType='Event'  # Asynchronous
+            InvocationType='Event',  # Asynchronous
+            Payload=json.dumps({'force': True})
         )
         
         if response['StatusCode'] in [200, 202]:
@@ -0,0 +1,134 @@
+"""
+Columnar archive of scan findings
+
+Flattens each scan's findings into one row per finding and appends them to
+a Parquet dataset partitioned by scan_date/account_id/service, on local
+disk or S3 (ARCHIVE_PATH=s3://bucket/prefix). Each scanner result also
+gets one marker row without a resource or cost, so a scan that found
+nothing still shows up in trends. Analytics read it back with
+column projection and partition pruning instead of decoding DynamoDB blobs.
+
+Requires pyarrow (not in the Lambda runtime - ship it as a layer).
+"""
+import json
+
+from findings_index import get_resource_id, iter_findings
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:
+    pa = None
+
+PARTITION_COLUMNS = ['scan_date', 'account_id', 'service']
+
+# Rows buffered before each write, so large scans are archived in batches
+ARCHIVE_BATCH_ROWS = 10000
+
+def archive_schema():
+    """
+    Schema of the flattened findings table
+    """
+    return pa.schema([
+        ('scan_id', pa.string()),
+        ('scan_timestamp', pa.string()),
+        ('scan_date', pa.string()),
+        ('account_id', pa.string()),
+        ('region', pa.string()),
+        ('service', pa.string()),
+        ('finding_type', pa.string()),
+        ('resource_id', pa.string()),
+        ('severity', pa.string()),
+        ('monthly_cost_usd', pa.float64()),
+        ('annual_savings_usd', pa.float64()),
+        ('recommendation', pa.string()),
+        ('tags', pa.string())
+    ])
+
+def partitioning():
+    """
+    Hive-style scan_date=/account_id=/service= directory layout
+    """
+    schema = archive_schema()
+    return ds.partitioning(pa.schema([schema.field(c) for c in PARTITION_COLUMNS]), flavor='hive')
+
+def flatten_findings(scan_id, report, batch_rows=ARCHIVE_BATCH_ROWS):
+    """
+    Turn a report into column-oriented dicts of lists, one entry per finding
+    plus one marker entry (null resource_id and costs) per scanner result
+    Yields a batch every batch_rows entries
+    """
+    names = archive_schema().names
+    columns = {name: [] for name in names}
+    scan_timestamp = report['scan_timestamp']
+
+    def append(result, finding):
+        columns['scan_id'].append(scan_id)
+        columns['scan_timestamp'].append(scan_timestamp)
+        columns['scan_date'].append(scan_timestamp[:10])
+        columns['account_id'].append(report.get('account_id', 'default'))
+        columns['region'].append(report.get('region'))
+        columns['service'].append(result.get('service', 'Unknown'))
+        columns['finding_type'].append(result.get('finding_type', 'Unknown'))
+        if finding is None:
+            for name in ('resource_id', 'severity', 'monthly_cost_usd', 'annual_savings_usd', 'recommendation', 'tags'):
+                columns[name].append(None)
+            return
+        columns['resource_id'].append(get_resource_id(finding))
+        columns['severity'].append(finding.get('severity'))
+        columns['monthly_cost_usd'].append(float(finding.get('monthly_cost_usd', 0)))
+        columns['annual_savings_usd'].append(float(finding.get('annual_savings_usd', 0)))
+        columns['recommendation'].append(finding.get('recommendation'))
+        columns['tags'].append(json.dumps(finding['tags']) if 'tags' in finding else None)
+
+    # Markers record that each scanner ran, even when it found nothing
+    for result in report['detailed_results']:
+        append(result, None)
+
+    for result, finding in iter_findings(report['detailed_results']):
+        append(result, finding)
+
+        if len(columns['scan_id']) >= batch_rows:
+            yield columns
+            columns = {name: [] for name in names}
+
+    if columns['scan_id']:
+        yield columns
+
+def resolve_archive_path(archive_path):
+    """
+    Return (filesystem, path) for a local directory or s3:// URI
+    """
+    if '://' in archive_path:
+        return pafs.FileSystem.from_uri(archive_path)
+    return pafs.LocalFileSystem(), archive_path
+
+def write_archive(scan_id, report, archive_path):
+    """
+    Append a scan's findings to the partitioned Parquet archive
+    Returns the number of rows written, marker rows included
+    """
+    if pa is None:
+        raise RuntimeError('pyarrow is required for archiving (pip install pyarrow)')
+
+    filesystem, path = resolve_archive_path(archive_path)
+    rows = 0
+
+    for batch, columns in enumerate(flatten_findings(scan_id, report)):
+        table = pa.table(columns, schema=archive_schema())
+        ds.write_dataset(
+            table,
+            path,
+            filesystem=filesystem,
+            format='parquet',
+            partitioning=partitioning(),
+            # One file per scan, batch and partition; re-archiving a scan overwrites it
+            basename_template=f"{scan_id}-{batch}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        rows += table.num_rows
+
+    if rows:
+        print(f"✓ Archived {rows} rows to {archive_path}")
+    return rows
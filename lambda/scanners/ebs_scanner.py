@@ -1,40 +1,30 @@
 import boto3
 import json
+import os
 from datetime import datetime
 from typing import List, Dict
 
+from volume_state import get_state_store, load_detach_events, track_available_volumes, idle_hours
+
+SERVICE = 'EBS'
+FINDING_TYPE = 'Unattached Volumes'
+
+# Volumes detached more recently than this are not reported yet
+DEFAULT_GRACE_PERIOD_HOURS = 24
+
 def lambda_handler(event, context):
     """
-    Scans for unattached EBS volumes and calculates potential cost savings
+    Scans for EBS volumes that have been unattached longer than a grace
+    period and calculates potential cost savings
     """
-    ec2 = boto3.client('ec2')
-    findings = []
+    stats = {}
+    
+    # Volume state is kept per account/region
+    if getattr(context, 'invoked_function_arn', None):
+        event = {'account_id': context.invoked_function_arn.split(':')[4], **(event or {})}
     
     try:
-        # Get all EBS volumes
-        response = ec2.describe_volumes()
-        
-        for volume in response['Volumes']:
-            # Check if volume is unattached
-            if volume['State'] == 'available':
-                # Calculate monthly cost (approximate)
-                size_gb = volume['Size']
-                volume_type = volume['VolumeType']
-                monthly_cost = calculate_volume_cost(size_gb, volume_type)
-                
-                finding = {
-                    'volume_id': volume['VolumeId'],
-                    'size_gb': size_gb,
-                    'volume_type': volume_type,
-                    'availability_zone': volume['AvailabilityZone'],
-                    'created_date': volume['CreateTime'].isoformat(),
-                    'monthly_cost_usd': round(monthly_cost, 2),
-                    'annual_savings_usd': round(monthly_cost * 12, 2),
-                    'recommendation': 'Delete unused volume or create snapshot and delete',
-                    'severity': 'MEDIUM'
-                }
-                
-                findings.append(finding)
+        findings = list(scan(event, stats))
         
         # Calculate total potential savings
         total_monthly = sum(f['monthly_cost_usd'] for f in findings)
@@ -42,8 +32,9 @@ def lambda_handler(event, context):
         
         result = {
             'scan_timestamp': datetime.utcnow().isoformat(),
-            'service': 'EBS',
-            'finding_type': 'Unattached Volumes',
+            'service': SERVICE,
+            'finding_type': FINDING_TYPE,
+            **stats,
             'total_findings': len(findings),
             'total_monthly_savings_usd': round(total_monthly, 2),
             'total_annual_savings_usd': round(total_annual, 2),
@@ -56,7 +47,7 @@ def lambda_handler(event, context):
             'statusCode': 200,
             'body': json.dumps(result)
         }
-        
+    
     except Exception as e:
         print(f"Error scanning EBS volumes: {str(e)}")
         return {
@@ -64,6 +55,98 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': str(e)})
         }
 
+def scan(event, stats, graph=None, session=None):
+    """
+    Yield a finding for every volume unattached longer than the grace period
+    Extra result fields (grace period, volumes skipped) are set on stats
+    Volumes come from the shared resource graph if given
+    Clients are created from session (default: the boto3 default session)
+    """
+    ec2 = (session or boto3).client('ec2')
+    event = event or {}
+    grace_period_hours = float(event.get(
+        'grace_period_hours',
+        os.environ.get('IDLE_GRACE_HOURS', DEFAULT_GRACE_PERIOD_HOURS)
+    ))
+    now = datetime.utcnow().isoformat()
+    
+    # Only unattached volumes are listed; keep just the fields findings need
+    if graph is not None:
+        available = (v for v in graph.resources('volume') if v['State'] == 'available')
+    else:
+        paginator = ec2.get_paginator('describe_volumes')
+        available = (
+            volume
+            for page in paginator.paginate(Filters=[{'Name': 'status', 'Values': ['available']}])
+            for volume in page['Volumes']
+        )
+    volumes = [
+        {
+            'VolumeId': volume['VolumeId'],
+            'Size': volume['Size'],
+            'VolumeType': volume['VolumeType'],
+            'AvailabilityZone': volume['AvailabilityZone'],
+            'CreateTime': volume['CreateTime']
+        }
+        for volume in available
+    ]
+    
+    # Work out how long each volume has been unattached
+    events_path = os.environ.get('VOLUME_EVENTS_PATH')
+    detach_events = load_detach_events(events_path) if events_path else None
+    scope = f"{event.get('account_id', 'default')}_{ec2.meta.region_name}"
+    try:
+        available_since = track_available_volumes(
+            [volume['VolumeId'] for volume in volumes],
+            get_state_store(scope, session),
+            now,
+            detach_events
+        )
+    except Exception as e:
+        # No state store yet: fall back to the volume's creation time
+        print(f"Volume state tracking skipped: {str(e)}")
+        available_since = {
+            volume['VolumeId']: volume['CreateTime'].replace(tzinfo=None).isoformat()
+            for volume in volumes
+        }
+    
+    stats['grace_period_hours'] = grace_period_hours
+    stats['volumes_in_grace_period'] = 0
+    
+    for volume in volumes:
+        idle_since = available_since[volume['VolumeId']]
+        hours_idle = idle_hours(idle_since, now)
+        
+        # Skip volumes detached too recently (e.g. mid-deploy)
+        if hours_idle < grace_period_hours:
+            stats['volumes_in_grace_period'] += 1
+            continue
+        
+        # Calculate monthly cost (approximate)
+        size_gb = volume['Size']
+        volume_type = volume['VolumeType']
+        monthly_cost = calculate_volume_cost(size_gb, volume_type)
+        
+        finding = {
+            'volume_id': volume['VolumeId'],
+            'size_gb': size_gb,
+            'volume_type': volume_type,
+            'availability_zone': volume['AvailabilityZone'],
+            'created_date': volume['CreateTime'].isoformat(),
+            'idle_since': idle_since,
+            'idle_days': round(hours_idle / 24, 1),
+            'monthly_cost_usd': round(monthly_cost, 2),
+            'annual_savings_usd': round(monthly_cost * 12, 2),
+            'recommendation': 'Delete unused volume or create snapshot and delete',
+            'severity': 'MEDIUM'
+        }
+        
+        # The volume together with the snapshots taken from it
+        if graph is not None:
+            finding['dependency_chain'] = graph.volume_chain(volume['VolumeId'])
+        
+        yield finding
+
 def calculate_volume_cost(size_gb: int, volume_type: str) -> float:
     """
     Calculate approximate monthly cost for EBS volume
@@ -81,4 +164,4 @@ def calculate_volume_cost(size_gb: int, volume_type: str) -> float:
     }
     
     price_per_gb = pricing.get(volume_type, 0.10)  # Default to gp2 pricing
-    return size_gb * price_per_gb
\ No newline at end of file
+    return size_gb * price_per_gb
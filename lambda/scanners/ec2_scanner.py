@@ -3,50 +3,17 @@ import json
 from datetime import datetime, timedelta
 from typing import List, Dict
 
+SERVICE = 'EC2'
+FINDING_TYPE = 'Idle Instances'
+
 def lambda_handler(event, context):
     """
     Scans for idle or underutilized EC2 instances
     """
-    ec2 = boto3.client('ec2')
-    cloudwatch = boto3.client('cloudwatch')
-    findings = []
+    stats = {}
     
     try:
-        # Get all running instances
-        response = ec2.describe_instances(
-            Filters=[{'Name': 'instance-state-name', 'Values': ['running']}]
-        )
-        
-        for reservation in response['Reservations']:
-            for instance in reservation['Instances']:
-                instance_id = instance['InstanceId']
-                instance_type = instance['InstanceType']
-                
-                # Get CPU utilization for last 7 days
-                avg_cpu = get_average_cpu_utilization(cloudwatch, instance_id, days=7)
-                
-                # Flag if CPU usage is consistently low
-                if avg_cpu is not None and avg_cpu < 5.0:
-                    monthly_cost = estimate_instance_cost(instance_type)
-                    
-                    finding = {
-                        'instance_id': instance_id,
-                        'instance_type': instance_type,
-                        'availability_zone': instance['Placement']['AvailabilityZone'],
-                        'launch_time': instance['LaunchTime'].isoformat(),
-                        'average_cpu_percent': round(avg_cpu, 2),
-                        'monthly_cost_usd': round(monthly_cost, 2),
-                        'annual_savings_usd': round(monthly_cost * 12, 2),
-                        'recommendation': 'Consider stopping or downsizing this instance due to low utilization',
-                        'severity': 'HIGH' if avg_cpu < 2.0 else 'MEDIUM'
-                    }
-                    
-                    # Add tags if available
-                    if 'Tags' in instance:
-                        tags = {tag['Key']: tag['Value'] for tag in instance['Tags']}
-                        finding['tags'] = tags
-                    
-                    findings.append(finding)
+        findings = list(scan(event, stats))
         
         # Calculate total potential savings
         total_monthly = sum(f['monthly_cost_usd'] for f in findings)
@@ -54,8 +21,9 @@ def lambda_handler(event, context):
         
         result = {
             'scan_timestamp': datetime.utcnow().isoformat(),
-            'service': 'EC2',
-            'finding_type': 'Idle Instances',
+            'service': SERVICE,
+            'finding_type': FINDING_TYPE,
+            **stats,
             'total_findings': len(findings),
             'total_monthly_savings_usd': round(total_monthly, 2),
             'total_annual_savings_usd': round(total_annual, 2),
@@ -68,7 +36,7 @@ def lambda_handler(event, context):
             'statusCode': 200,
             'body': json.dumps(result)
         }
-        
+    
     except Exception as e:
         print(f"Error scanning EC2 instances: {str(e)}")
         return {
@@ -76,6 +44,71 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': str(e)})
         }
 
+def scan(event, stats, graph=None, session=None):
+    """
+    Yield a finding for every running instance with low average CPU
+    Instances come from the shared resource graph if given, otherwise
+    they are fetched page by page
+    Clients are created from session (default: the boto3 default session)
+    """
+    ec2 = (session or boto3).client('ec2')
+    cloudwatch = (session or boto3).client('cloudwatch')
+    
+    # Get all running instances
+    if graph is not None:
+        instances = [i for i in graph.resources('instance') if i['State']['Name'] == 'running']
+    else:
+        paginator = ec2.get_paginator('describe_instances')
+        pages = paginator.paginate(
+            Filters=[{'Name': 'instance-state-name', 'Values': ['running']}]
+        )
+        instances = (
+            instance
+            for page in pages
+            for reservation in page['Reservations']
+            for instance in reservation['Instances']
+        )
+    
+    for instance in instances:
+        instance_id = instance['InstanceId']
+        instance_type = instance['InstanceType']
+        
+        # Get CPU utilization for last 7 days (memoized in the run's inventory cache)
+        if graph is not None:
+            avg_cpu = graph.inventory.lookup(
+                'cpu_7d', instance_id,
+                lambda: get_average_cpu_utilization(cloudwatch, instance_id, days=7)
+            )
+        else:
+            avg_cpu = get_average_cpu_utilization(cloudwatch, instance_id, days=7)
+        
+        # Flag if CPU usage is consistently low
+        if avg_cpu is not None and avg_cpu < 5.0:
+            monthly_cost = estimate_instance_cost(instance_type)
+            
+            finding = {
+                'instance_id': instance_id,
+                'instance_type': instance_type,
+                'availability_zone': instance['Placement']['AvailabilityZone'],
+                'launch_time': instance['LaunchTime'].isoformat(),
+                'average_cpu_percent': round(avg_cpu, 2),
+                'monthly_cost_usd': round(monthly_cost, 2),
+                'annual_savings_usd': round(monthly_cost * 12, 2),
+                'recommendation': 'Consider stopping or downsizing this instance due to low utilization',
+                'severity': 'HIGH' if avg_cpu < 2.0 else 'MEDIUM'
+            }
+            
+            # Add tags if available
+            if 'Tags' in instance:
+                tags = {tag['Key']: tag['Value'] for tag in instance['Tags']}
+                finding['tags'] = tags
+            
+            # Everything that goes away with the instance
+            if graph is not None:
+                finding['dependency_chain'] = graph.instance_chain(instance_id, monthly_cost)
+            
+            yield finding
+
 def get_average_cpu_utilization(cloudwatch, instance_id: str, days: int = 7) -> float:
     """
     Get average CPU utilization for an instance over the specified period
@@ -100,7 +133,7 @@ def get_average_cpu_utilization(cloudwatch, instance_id: str, days: int = 7) ->
             return avg_cpu
         
         return None
-        
+    
     except Exception as e:
         print(f"Error getting CloudWatch metrics for {instance_id}: {str(e)}")
         return None
@@ -3,39 +3,20 @@ import json
 from datetime import datetime
 from typing import List, Dict
 
+SERVICE = 'EC2'
+FINDING_TYPE = 'Unattached Elastic IPs'
+
+# An unassociated Elastic IP, ~$0.005 per hour
+IDLE_EIP_MONTHLY_COST = 3.60
+
 def lambda_handler(event, context):
     """
     Scans for unattached Elastic IPs (which incur charges)
     """
-    ec2 = boto3.client('ec2')
-    findings = []
+    stats = {}
     
     try:
-        # Get all Elastic IPs
-        response = ec2.describe_addresses()
-        
-        for address in response['Addresses']:
-            # Check if EIP is not associated with any instance
-            if 'AssociationId' not in address:
-                # Unattached EIPs cost money!
-                monthly_cost = 3.60  # ~$0.005 per hour
-                
-                finding = {
-                    'allocation_id': address['AllocationId'],
-                    'public_ip': address['PublicIp'],
-                    'domain': address.get('Domain', 'vpc'),
-                    'monthly_cost_usd': monthly_cost,
-                    'annual_savings_usd': round(monthly_cost * 12, 2),
-                    'recommendation': 'Release this Elastic IP if not needed, or associate it with an instance',
-                    'severity': 'LOW'
-                }
-                
-                # Add tags if available
-                if 'Tags' in address:
-                    tags = {tag['Key']: tag['Value'] for tag in address['Tags']}
-                    finding['tags'] = tags
-                
-                findings.append(finding)
+        findings = list(scan(event, stats))
         
         # Calculate total potential savings
         total_monthly = sum(f['monthly_cost_usd'] for f in findings)
@@ -43,8 +24,9 @@ def lambda_handler(event, context):
         
         result = {
             'scan_timestamp': datetime.utcnow().isoformat(),
-            'service': 'EC2',
-            'finding_type': 'Unattached Elastic IPs',
+            'service': SERVICE,
+            'finding_type': FINDING_TYPE,
+            **stats,
             'total_findings': len(findings),
             'total_monthly_savings_usd': round(total_monthly, 2),
             'total_annual_savings_usd': round(total_annual, 2),
@@ -57,10 +39,45 @@ def lambda_handler(event, context):
             'statusCode': 200,
             'body': json.dumps(result)
         }
-        
+    
     except Exception as e:
         print(f"Error scanning Elastic IPs: {str(e)}")
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+        }
+
+def scan(event, stats, graph=None, session=None):
+    """
+    Yield a finding for every Elastic IP not associated with anything
+    Addresses come from the shared resource graph if given
+    Clients are created from session (default: the boto3 default session)
+    """
+    if graph is not None:
+        addresses = graph.resources('address')
+    else:
+        # Get all Elastic IPs (DescribeAddresses is not paginated)
+        addresses = (session or boto3).client('ec2').describe_addresses()['Addresses']
+    
+    for address in addresses:
+        # Check if EIP is not associated with any instance
+        if 'AssociationId' not in address:
+            # Unattached EIPs cost money!
+            monthly_cost = IDLE_EIP_MONTHLY_COST
+            
+            finding = {
+                'allocation_id': address['AllocationId'],
+                'public_ip': address['PublicIp'],
+                'domain': address.get('Domain', 'vpc'),
+                'monthly_cost_usd': monthly_cost,
+                'annual_savings_usd': round(monthly_cost * 12, 2),
+                'recommendation': 'Release this Elastic IP if not needed, or associate it with an instance',
+                'severity': 'LOW'
+            }
+            
+            # Add tags if available
+            if 'Tags' in address:
+                tags = {tag['Key']: tag['Value'] for tag in address['Tags']}
+                finding['tags'] = tags
+            
+            yield finding
\ No newline at end of file
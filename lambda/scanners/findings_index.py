@@ -0,0 +1,220 @@
+"""
+Per-resource findings index
+
+Keeps one DynamoDB item per flagged resource (resource_id -> first_seen,
+last_seen, idle_since, cumulative cost) so resource history is a single
+GetItem instead of a replay of every scan's detailed_results blob.
+The index is updated incrementally each time a scan is saved.
+"""
+import boto3
+import heapq
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from report_writer import read_findings
+
+FINDINGS_TABLE = 'cost-optimizer-findings'
+
+# Marker item holding the timestamp of the last indexed scan
+LAST_SCAN_KEY = '__last_scan__'
+
+# Checked in order: snapshot findings also carry the source volume_id
+RESOURCE_ID_FIELDS = ['snapshot_id', 'instance_id', 'allocation_id', 'volume_id']
+
+HOURS_PER_MONTH = 730
+
+# Findings stored pre-sorted with each scan for top-N API queries
+TOP_FINDINGS_COUNT = 200
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_KEYS = 100
+
+# Attempts at reading throttled (unprocessed) keys before giving up
+BATCH_GET_MAX_ATTEMPTS = 8
+
+def get_resource_id(finding):
+    """
+    Return the AWS resource ID a finding refers to, or None
+    """
+    for field in RESOURCE_ID_FIELDS:
+        value = finding.get(field)
+        if value and value != 'N/A':
+            return value
+    return None
+
+def iter_findings(detailed_results):
+    """
+    Yield (scan_result, finding) pairs across all scanner results
+    Results whose findings were streamed to a report file are read back from it
+    """
+    for result in detailed_results:
+        if result.get('findings_truncated'):
+            findings = read_findings(result['findings_location'], result['scanner'])
+        else:
+            findings = result.get('findings', [])
+        for finding in findings:
+            yield result, finding
+
+def flatten_finding(result, finding):
+    """
+    Copy a finding with its scanner's service/finding_type and its resource ID
+    """
+    return {
+        **finding,
+        'service': result.get('service', 'Unknown'),
+        'finding_type': result.get('finding_type', 'Unknown'),
+        'resource_id': get_resource_id(finding)
+    }
+
+class RunningTopFindings:
+    """Keeps the n most expensive findings seen so far in a bounded heap"""
+
+    def __init__(self, n=TOP_FINDINGS_COUNT):
+        self.n = n
+        self.heap = []
+        self.seen = 0
+        self.lock = threading.Lock()
+
+    def add(self, result, finding):
+        with self.lock:
+            self.push(finding.get('monthly_cost_usd', 0), lambda: flatten_finding(result, finding))
+
+    def merge(self, other):
+        """
+        Add the findings kept by another RunningTopFindings, in the order it saw them
+        """
+        with self.lock:
+            for cost, _, flat in sorted(other.heap, key=lambda e: -e[1]):
+                self.push(cost, lambda: flat)
+
+    def push(self, cost, flatten):
+        self.seen += 1
+        # Earlier findings win ties, as with heapq.nlargest
+        key = (cost, -self.seen)
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, (*key, flatten()))
+        elif key > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, (*key, flatten()))
+
+    def findings(self):
+        return [entry[2] for entry in sorted(self.heap, key=lambda e: e[:2], reverse=True)]
+
+def top_findings(report, n=TOP_FINDINGS_COUNT):
+    """
+    The n most expensive findings of a report, flattened, by monthly cost descending
+    """
+    top = RunningTopFindings(n)
+    for result, finding in iter_findings(report['detailed_results']):
+        top.add(result, finding)
+    return top.findings()
+
+def accrued_cost(monthly_cost, since, until):
+    """
+    Cost accrued by a resource billed at monthly_cost between two ISO timestamps
+    """
+    hours = (datetime.fromisoformat(until) - datetime.fromisoformat(since)).total_seconds() / 3600
+    return Decimal(str(round(float(monthly_cost) * max(hours, 0) / HOURS_PER_MONTH, 4)))
+
+def load_index_rows(dynamodb, resource_ids):
+    """
+    Current index items for up to BATCH_GET_KEYS resource IDs, keyed by resource_id
+    """
+    rows = {}
+    request = {FINDINGS_TABLE: {'Keys': [{'resource_id': resource_id} for resource_id in resource_ids]}}
+    for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+        if attempt:
+            # Throttled keys come back unprocessed: back off before asking again
+            time.sleep(min(0.05 * 2 ** attempt, 5))
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response['Responses'].get(FINDINGS_TABLE, []):
+            rows[item['resource_id']] = item
+        request = response.get('UnprocessedKeys')
+        if not request:
+            return rows
+    raise RuntimeError(f"Findings index read still throttled after {BATCH_GET_MAX_ATTEMPTS} attempts")
+
+def index_item(old, scan_id, now, previous_timestamp, result, finding):
+    """
+    New index item for a flagged resource given its current item (or None)
+    """
+    monthly_cost = Decimal(str(finding.get('monthly_cost_usd', 0)))
+    old = old or {}
+    old_last_seen = old.get('last_seen')
+    cumulative_cost = old.get('cumulative_cost_usd', Decimal('0'))
+
+    if old_last_seen and previous_timestamp and old_last_seen >= previous_timestamp:
+        # Still flagged since the previous scan: charge the elapsed interval
+        cumulative_cost += accrued_cost(old.get('monthly_cost_usd', monthly_cost), old_last_seen, now)
+        idle_since = old.get('idle_since', now)
+    else:
+        # New resource, or it disappeared for at least one scan: start a new idle run
+        idle_since = now
+
+    return {
+        **old,
+        'resource_id': get_resource_id(finding),
+        'first_seen': old.get('first_seen', now),
+        'idle_since': idle_since,
+        'last_seen': now,
+        'last_scan_id': scan_id,
+        'service': result.get('service', 'Unknown'),
+        'finding_type': result.get('finding_type', 'Unknown'),
+        'monthly_cost_usd': monthly_cost,
+        'severity': finding.get('severity', 'LOW'),
+        'scan_count': old.get('scan_count', 0) + 1,
+        'cumulative_cost_usd': cumulative_cost
+    }
+
+def update_findings_index(scan_id, report, dynamodb=None):
+    """
+    Upsert every finding of a report into the findings index
+
+    first_seen is the first time a resource was ever flagged, idle_since the
+    start of its current uninterrupted run of findings. Cost is accrued for
+    the interval since last_seen only when the resource was also flagged in
+    the previous scan, so a resource that was fixed and came back is not
+    charged for the gap.
+
+    Findings are handled BATCH_GET_KEYS at a time: one BatchGetItem reads
+    their current items, the new items are computed client-side and
+    written with batched PutItem requests. Only the master scanner writes
+    the index, so the read-then-write needs no conditions.
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    table = dynamodb.Table(FINDINGS_TABLE)
+    now = report['scan_timestamp']
+
+    previous_scan = table.get_item(Key={'resource_id': LAST_SCAN_KEY}).get('Item', {})
+    previous_timestamp = previous_scan.get('last_seen')
+
+    seen = set()
+    indexed = 0
+    with table.batch_writer() as batch:
+        chunk = []
+
+        def flush():
+            rows = load_index_rows(dynamodb, [get_resource_id(finding) for _, finding in chunk])
+            for result, finding in chunk:
+                old = rows.get(get_resource_id(finding))
+                batch.put_item(Item=index_item(old, scan_id, now, previous_timestamp, result, finding))
+            chunk.clear()
+
+        for result, finding in iter_findings(report['detailed_results']):
+            resource_id = get_resource_id(finding)
+            # A resource is indexed once per scan even if several findings name it
+            if not resource_id or resource_id in seen:
+                continue
+            seen.add(resource_id)
+            chunk.append((result, finding))
+            indexed += 1
+            if len(chunk) == BATCH_GET_KEYS:
+                flush()
+        if chunk:
+            flush()
+
+        batch.put_item(Item={'resource_id': LAST_SCAN_KEY, 'last_seen': now, 'last_scan_id': scan_id})
+
+    print(f"✓ Indexed {indexed} findings in DynamoDB table: {FINDINGS_TABLE}")
+    return indexed
@@ -0,0 +1,205 @@
+"""
+Per-run inventory cache
+
+Fetches each resource type (instances, volumes, Elastic IPs, snapshots)
+at most once per account/region and run, only when a scanner first asks
+for it; types requested together are fetched concurrently, and only the
+fields in INVENTORY_FIELDS are kept. Other per-resource lookups, such as
+CloudWatch CPU averages, are memoized the same way.
+
+Fetches run on the cache's own threads, so with an ApiCallCounter their
+AWS calls are counted there and reported as the cache's api_calls rather
+than attributed to whichever scanner first asked for a resource type.
+
+With INVENTORY_CACHE_PATH set, the cache is also saved to and loaded from
+a local JSON file per account/region. A re-run within INVENTORY_MAX_AGE_HOURS
+reuses it, and INVENTORY_OFFLINE=1 re-analyzes the saved inventory (e.g.
+with new thresholds) without calling AWS at all.
+"""
+import boto3
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+DEFAULT_MAX_AGE_HOURS = 1
+
+def paginate(ec2, operation, key, **kwargs):
+    """
+    Yield the items of a paginated Describe* call page by page
+    """
+    for page in ec2.get_paginator(operation).paginate(**kwargs):
+        yield from page[key]
+
+def fetch_instances(ec2):
+    for reservation in paginate(ec2, 'describe_instances', 'Reservations'):
+        yield from reservation['Instances']
+
+def fetch_volumes(ec2):
+    return paginate(ec2, 'describe_volumes', 'Volumes')
+
+def fetch_addresses(ec2):
+    # DescribeAddresses is not paginated
+    return ec2.describe_addresses()['Addresses']
+
+def fetch_snapshots(ec2):
+    return paginate(ec2, 'describe_snapshots', 'Snapshots', OwnerIds=['self'])
+
+INVENTORY_TYPES = {
+    'instance': fetch_instances,
+    'volume': fetch_volumes,
+    'address': fetch_addresses,
+    'snapshot': fetch_snapshots
+}
+
+# Describe* fields the scanners and the resource graph read; everything
+# else (network interfaces, security groups, ...) is dropped as each page
+# arrives, so holding all four inventories for the run stays small
+INVENTORY_FIELDS = {
+    'instance': ('InstanceId', 'InstanceType', 'State', 'LaunchTime', 'Placement', 'BlockDeviceMappings', 'Tags'),
+    'volume': ('VolumeId', 'Size', 'VolumeType', 'State', 'AvailabilityZone', 'CreateTime', 'Attachments', 'Tags'),
+    'address': ('AllocationId', 'PublicIp', 'Domain', 'AssociationId', 'InstanceId', 'Tags'),
+    'snapshot': ('SnapshotId', 'VolumeId', 'VolumeSize', 'State', 'StartTime', 'Description', 'Tags')
+}
+
+def trim(item, fields):
+    """Keep only the listed fields of a Describe* item"""
+    return {field: item[field] for field in fields if field in item}
+
+def encode(value):
+    """JSON fallback for the datetimes in Describe* responses"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def decode(obj):
+    """Turn the *Time fields saved by encode back into datetimes"""
+    for key, value in obj.items():
+        if key.endswith('Time') and isinstance(value, str):
+            obj[key] = datetime.fromisoformat(value)
+    return obj
+
+class InventoryCache:
+    """Lazily fetched, optionally persisted inventories of one account/region"""
+
+    def __init__(self, scope, path=None, max_age_hours=DEFAULT_MAX_AGE_HOURS, offline=False, session=None, counter=None):
+        self.scope = scope
+        self.session = session
+        self.counter = counter
+        self.api_calls = {}
+        self.path = os.path.join(path, f"inventory-{scope}.json") if path else None
+        self.offline = offline
+        self.entries = {}
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=len(INVENTORY_TYPES))
+        self.ec2 = None
+        self.load(max_age_hours)
+
+    def load(self, max_age_hours):
+        """
+        Load saved entries younger than max_age_hours (all of them offline)
+        """
+        if not self.path or not os.path.exists(self.path):
+            if self.offline:
+                raise RuntimeError(f"No saved inventory for offline analysis: {self.path}")
+            return
+
+        with open(self.path) as f:
+            saved = json.load(f, object_hook=decode)
+
+        cutoff = (datetime.utcnow() - timedelta(hours=max_age_hours)).isoformat()
+        self.entries = {
+            name: entry for name, entry in saved.items()
+            if self.offline or entry['fetched_at'] >= cutoff
+        }
+        print(f"✓ Inventory cache: reusing {', '.join(sorted(self.entries)) or 'nothing'} from {self.path}")
+
+    def prefetch(self, *resource_types):
+        """
+        Start fetching resource types in the background
+        """
+        for resource_type in resource_types:
+            self.submit(resource_type)
+
+    def submit(self, resource_type):
+        with self.lock:
+            future = self.futures.get(resource_type)
+            if future is None:
+                if resource_type in self.entries:
+                    future = Future()
+                    future.set_result(self.entries[resource_type]['items'])
+                elif self.offline:
+                    raise RuntimeError(f"{resource_type} inventory not saved in {self.path}")
+                else:
+                    # Clients are thread-safe, creating them is not
+                    self.ec2 = self.ec2 or (self.session or boto3).client('ec2')
+                    future = self.pool.submit(self.fetch, resource_type)
+                self.futures[resource_type] = future
+            return future
+
+    def fetch(self, resource_type):
+        if self.counter is not None:
+            self.counter.start()
+        try:
+            fields = INVENTORY_FIELDS[resource_type]
+            items = [trim(item, fields) for item in INVENTORY_TYPES[resource_type](self.ec2)]
+        finally:
+            calls = self.counter.stop() if self.counter is not None else {}
+        with self.lock:
+            self.entries[resource_type] = {'fetched_at': datetime.utcnow().isoformat(), 'items': items}
+            for name, count in calls.items():
+                self.api_calls[name] = self.api_calls.get(name, 0) + count
+        return items
+
+    def get(self, resource_type):
+        """
+        Inventory of one resource type, fetched on first use
+        """
+        return self.submit(resource_type).result()
+
+    def lookup(self, namespace, key, fetch):
+        """
+        Memoize a per-resource value, e.g. lookup('cpu_7d', instance_id, ...)
+        """
+        name = f"lookup:{namespace}"
+        with self.lock:
+            values = self.entries.get(name, {}).get('items', {})
+            if key in values:
+                return values[key]
+        if self.offline:
+            raise RuntimeError(f"{namespace} for {key} not saved in {self.path}")
+
+        value = fetch()
+        with self.lock:
+            entry = self.entries.setdefault(name, {'fetched_at': datetime.utcnow().isoformat(), 'items': {}})
+            entry['items'][key] = value
+        return value
+
+    def save(self):
+        """
+        Write everything fetched this run (and still fresh saved entries) to the cache file
+        """
+        if not self.path or self.offline:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock:
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f, default=encode)
+        print(f"✓ Inventory cache saved to {self.path}")
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+def get_inventory_cache(scope, counter=None):
+    """
+    Build the cache for one account/region from the environment
+    """
+    return InventoryCache(
+        scope,
+        path=os.environ.get('INVENTORY_CACHE_PATH'),
+        max_age_hours=float(os.environ.get('INVENTORY_MAX_AGE_HOURS', DEFAULT_MAX_AGE_HOURS)),
+        offline=os.environ.get('INVENTORY_OFFLINE') == '1',
+        counter=counter
+    )
@@ -0,0 +1,262 @@
+"""
+Local batch runner for the cost optimization scan pipeline
+
+Runs every scanner against many account/region targets outside Lambda,
+e.g. as a long-lived job on an EC2 host. Targets are spread across a
+process pool, and the scanners for each target run on a thread pool since
+they spend most of their time waiting on AWS APIs. Reports are written to
+a local directory or a SQLite database instead of DynamoDB.
+
+Usage:
+    python local_runner.py --profiles dev prod --regions us-east-1 eu-west-1 --output reports
+    python local_runner.py --targets targets.json --sqlite scans.db --processes 8
+    python local_runner.py --profiles prod --inventory inventory            # save inventories
+    python local_runner.py --profiles prod --inventory inventory --offline  # re-analyze, no AWS calls
+
+A targets file is a JSON list of objects with a required "region" and an
+optional "profile" and/or "role_arn" (assumed before scanning):
+    [{"profile": "org-admin", "role_arn": "arn:aws:iam::123456789012:role/cost-optimizer", "region": "us-east-1"}]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import boto3
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from master_scanner import SCANNERS, run_scanner, build_report
+from resource_graph import ResourceGraph
+from inventory_cache import InventoryCache, DEFAULT_MAX_AGE_HOURS
+from archive_writer import write_archive
+
+def target_session_args(target):
+    """
+    boto3.session.Session arguments for the target account/region,
+    assuming the target's role first if it has one
+
+    Sessions are not thread-safe, so every thread builds its own session
+    from these arguments instead of sharing one.
+    """
+    profile = target.get('profile')
+    region = target['region']
+
+    if target.get('role_arn'):
+        base = boto3.session.Session(profile_name=profile, region_name=region)
+        credentials = base.client('sts').assume_role(
+            RoleArn=target['role_arn'],
+            RoleSessionName='cost-optimizer-local-runner'
+        )['Credentials']
+        return {
+            'aws_access_key_id': credentials['AccessKeyId'],
+            'aws_secret_access_key': credentials['SecretAccessKey'],
+            'aws_session_token': credentials['SessionToken'],
+            'region_name': region
+        }
+    return {'profile_name': profile, 'region_name': region}
+
+def run_scanner_in_session(scanner_name, scanner, event, session_args, graph):
+    """
+    Run one scanner on a session of its own (executed on a scanner thread)
+    """
+    session = boto3.session.Session(**session_args)
+    return run_scanner(scanner_name, scanner, event, None, graph=graph, session=session)
+
+def target_scope(target):
+    """
+    Inventory cache name of a target, known without calling AWS
+    """
+    parts = [target.get('profile') or 'default']
+    if target.get('role_arn'):
+        parts.append(target['role_arn'].split(':')[4])
+    parts.append(target['region'])
+    return '_'.join(parts)
+
+def run_target(target, scanner_threads=4, inventory_path=None, offline=False, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+    """
+    Run all scanners for one account/region target and return its report
+    Executed inside a worker process
+    """
+    started = time.time()
+    if offline:
+        # Clients are still created, but every answer comes from the saved inventory
+        session_args = {'region_name': target['region']}
+    else:
+        session_args = target_session_args(target)
+
+    # The inventory cache gets its own session for its fetch threads
+    session = boto3.session.Session(**session_args)
+    inventory = InventoryCache(target_scope(target), inventory_path, max_age_hours, offline, session)
+    account_id = inventory.lookup('account', 'id', lambda: session.client('sts').get_caller_identity()['Account'])
+    graph = ResourceGraph(inventory)
+
+    all_results = []
+    scan_errors = []
+    scanner_event = {'account_id': account_id, 'region': target['region']}
+
+    with ThreadPoolExecutor(max_workers=scanner_threads) as pool:
+        futures = [
+            pool.submit(run_scanner_in_session, scanner_name, scanner, scanner_event, session_args, graph)
+            for scanner_name, scanner in SCANNERS
+        ]
+        # Collect in scanner order so reports are stable between runs
+        for future in futures:
+            scan_data, error = future.result()
+            if scan_data is not None:
+                all_results.append(scan_data)
+            else:
+                scan_errors.append(error)
+
+    inventory.save()
+    inventory.close()
+
+    report = build_report(all_results, scan_errors)
+    report['account_id'] = account_id
+    report['region'] = target['region']
+    report['profile'] = target.get('profile')
+    report['duration_seconds'] = round(time.time() - started, 2)
+    return report
+
+def make_scan_id(report):
+    """
+    Build a scan ID that is unique per account/region/time
+    """
+    timestamp = datetime.fromisoformat(report['scan_timestamp']).strftime('%Y%m%d_%H%M%S')
+    return f"scan_{report['account_id']}_{report['region']}_{timestamp}"
+
+def write_json_report(report, output_dir):
+    """
+    Write a report to <output_dir>/<scan_id>.json
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{make_scan_id(report)}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def open_sqlite(db_path):
+    """
+    Open the SQLite report store, creating the scans table if needed
+    Columns mirror the DynamoDB item written by master_scanner
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scans (
+            scan_id TEXT PRIMARY KEY,
+            account_id TEXT,
+            region TEXT,
+            timestamp TEXT,
+            total_findings INTEGER,
+            monthly_savings REAL,
+            annual_savings REAL,
+            detailed_results TEXT,
+            errors TEXT,
+            status TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_scans_timestamp ON scans (timestamp)')
+    return conn
+
+def write_sqlite_report(conn, report):
+    """
+    Insert a report into the SQLite scans table
+    """
+    scan_id = make_scan_id(report)
+    conn.execute(
+        'INSERT OR REPLACE INTO scans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (
+            scan_id,
+            report['account_id'],
+            report['region'],
+            report['scan_timestamp'],
+            report['summary']['total_findings'],
+            report['summary']['total_monthly_savings_usd'],
+            report['summary']['total_annual_savings_usd'],
+            json.dumps(report['detailed_results']),
+            json.dumps(report['errors']),
+            report['scan_status']
+        )
+    )
+    conn.commit()
+    return scan_id
+
+def load_targets(args):
+    """
+    Build the target list from a targets file or the profile x region product
+    """
+    if args.targets:
+        with open(args.targets) as f:
+            return json.load(f)
+
+    profiles = args.profiles or [None]
+    return [
+        {'profile': profile, 'region': region}
+        for profile in profiles
+        for region in args.regions
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the cost optimizer scanners locally across many accounts/regions')
+    parser.add_argument('--targets', help='JSON file with a list of {profile, role_arn, region} targets')
+    parser.add_argument('--profiles', nargs='+', help='AWS CLI profiles to scan')
+    parser.add_argument('--regions', nargs='+', default=['us-east-1'], help='Regions to scan for each profile')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--threads', type=int, default=len(SCANNERS), help='Scanner threads per target')
+    parser.add_argument('--output', default='reports', help='Directory for JSON reports')
+    parser.add_argument('--sqlite', help='Write reports to this SQLite database instead of JSON files')
+    parser.add_argument('--archive', help='Also append findings to the Parquet archive at this path or s3:// URI')
+    parser.add_argument('--inventory', help='Directory to save and reuse resource inventories per target')
+    parser.add_argument('--max-age', type=float, default=DEFAULT_MAX_AGE_HOURS, help='Hours a saved inventory is reused')
+    parser.add_argument('--offline', action='store_true', help='Only use saved inventories, make no AWS calls')
+    args = parser.parse_args(argv)
+    if args.offline and not args.inventory:
+        parser.error('--offline requires --inventory')
+
+    targets = load_targets(args)
+    print(f"Scanning {len(targets)} account/region targets with {args.processes} processes...")
+
+    # Only the parent process writes, so SQLite never sees concurrent writers
+    conn = open_sqlite(args.sqlite) if args.sqlite else None
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        futures = {
+            pool.submit(run_target, target, args.threads, args.inventory, args.offline, args.max_age): target
+            for target in targets
+        }
+
+        for future in as_completed(futures):
+            target = futures[future]
+            label = f"{target.get('profile') or 'default'}/{target['region']}"
+            try:
+                report = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ {label}: {str(e)}")
+                continue
+
+            if conn:
+                location = write_sqlite_report(conn, report)
+            else:
+                location = write_json_report(report, args.output)
+
+            if args.archive:
+                write_archive(make_scan_id(report), report, args.archive)
+
+            summary = report['summary']
+            print(f"✓ {label}: {summary['total_findings']} findings, "
+                  f"${summary['total_monthly_savings_usd']}/month -> {location}")
+
+    if conn:
+        conn.close()
+
+    print(f"Completed {len(targets) - failed}/{len(targets)} targets")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,75 +8,174 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'scanners'))
 
 # Import all scanners
-from ebs_scanner import lambda_handler as ebs_scan
-from ec2_scanner import lambda_handler as ec2_scan
-from eip_scanner import lambda_handler as eip_scan
-from snapshot_scanner import lambda_handler as snapshot_scan
+import ebs_scanner
+import ec2_scanner
+import eip_scanner
+import snapshot_scanner
+
+from findings_index import update_findings_index, top_findings, iter_findings, RunningTopFindings
+from tag_index import save_tag_index
+from scan_history import update_scan_history
+from archive_writer import write_archive
+from report_writer import NdjsonReportWriter
+from resource_graph import ResourceGraph
+from inventory_cache import get_inventory_cache
+from scan_scheduler import FINDINGS_FIELDS, LATEST_SCAN_KEY, ApiCallCounter, estimate_api_cost, load_runs, get_intervals, plan_scanners, cached_result, record_run
+
+# List of all scanners to run; each module yields findings from scan()
+SCANNERS = [
+    ('EBS Volumes', ebs_scanner),
+    ('EC2 Instances', ec2_scanner),
+    ('Elastic IPs', eip_scanner),
+    ('EBS Snapshots', snapshot_scanner)
+]
+
+# Findings kept inline in the report across all scanners when REPORT_PATH
+# is on S3; the rest are only in the streamed NDJSON report (override with
+# INLINE_FINDINGS_LIMIT)
+DEFAULT_INLINE_FINDINGS_LIMIT = 1000
+
+# Tracks AWS API calls made by each scanner run
+API_COUNTER = ApiCallCounter()
 
 def lambda_handler(event, context):
     """
-    Master scanner that runs all cost optimization checks
-    and aggregates results
+    Master scanner that runs the cost optimization checks that are due,
+    reuses fresh results of the others and aggregates results
+    
+    Pass {"force": true} in the event to run every scanner now.
     """
     print("Starting comprehensive cost optimization scan...")
     
+    event = event or {}
     all_results = []
-    total_monthly_savings = 0
-    total_annual_savings = 0
     scan_errors = []
     
-    # List of all scanners to run
-    scanners = [
-        ('EBS Volumes', ebs_scan),
-        ('EC2 Instances', ec2_scan),
-        ('Elastic IPs', eip_scan),
-        ('EBS Snapshots', snapshot_scan)
-    ]
+    # Decide which scanners are due (all of them without run history)
+    scanner_names = [name for name, _ in SCANNERS]
+    try:
+        runs = load_runs()
+        # Forced scans run every scanner, so the budget does not apply
+        force = event.get('force', False)
+        budget = None if force else os.environ.get('SCAN_COST_BUDGET_USD')
+        to_run, reuse, postponed = plan_scanners(
+            scanner_names,
+            runs,
+            datetime.utcnow(),
+            get_intervals(),
+            force=force,
+            budget_usd=float(budget) if budget else None
+        )
+    except Exception as e:
+        print(f"Scanner run history unavailable, running all scanners: {str(e)}")
+        runs = None
+        to_run, reuse, postponed = scanner_names, [], []
     
-    # Run each scanner
-    for scanner_name, scanner_func in scanners:
+    API_COUNTER.register()
+    scan_cost = 0
+    scan_id = f"scan_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    
+    # With an S3 REPORT_PATH findings are streamed to the report as scanners
+    # yield them and only totals, the top findings and a bounded inline
+    # sample stay in memory; otherwise every finding is kept inline, since
+    # a report in the temporary directory is gone after this invocation
+    report_path = os.environ.get('REPORT_PATH', '')
+    writer = NdjsonReportWriter(scan_id, report_path) if report_path.startswith('s3://') else None
+    top = RunningTopFindings()
+    inline_budget = int(os.environ.get('INLINE_FINDINGS_LIMIT', DEFAULT_INLINE_FINDINGS_LIMIT))
+    
+    # Scanners keep per-account/region state (e.g. EBS idle clocks)
+    account_id = context.invoked_function_arn.split(':')[4] if getattr(context, 'invoked_function_arn', None) else 'default'
+    scanner_event = {'account_id': account_id, **event}
+    
+    # Inventories are fetched once, on first use, and shared by all scanners
+    # through the resource graph (they describe on their own without it)
+    graph = None
+    if to_run:
         try:
-            print(f"Running {scanner_name} scanner...")
-            result = scanner_func(event, context)
-            
-            if result['statusCode'] == 200:
-                scan_data = json.loads(result['body'])
+            inventory = get_inventory_cache(f"{account_id}_{os.environ.get('AWS_REGION')}", API_COUNTER)
+            graph = ResourceGraph(inventory)
+        except Exception as e:
+            print(f"Inventory cache unavailable, scanners will describe resources: {str(e)}")
+    
+    # Run each due scanner, reuse the last result of the others
+    ran = []
+    reused = []
+    for scanner_name, scanner in SCANNERS:
+        if scanner_name in reuse:
+            print(f"↺ {scanner_name}: reusing result from {runs[scanner_name]['last_run']}")
+            try:
+                # Re-emitted into this scan's report like fresh findings
+                scan_data = reuse_result(
+                    scanner_name, cached_result(runs[scanner_name]),
+                    writer=writer, top=top, inline_limit=inline_budget
+                )
+                inline_budget -= len(scan_data['findings'])
+                reused.append(scanner_name)
                 all_results.append(scan_data)
-                
-                # Aggregate savings
-                total_monthly_savings += scan_data.get('total_monthly_savings_usd', 0)
-                total_annual_savings += scan_data.get('total_annual_savings_usd', 0)
-                
-                print(f"✓ {scanner_name}: Found {scan_data['total_findings']} issues")
-            else:
-                scan_errors.append({
-                    'scanner': scanner_name,
-                    'error': result.get('body', 'Unknown error')
-                })
-                print(f"✗ {scanner_name}: Failed with error")
-                
+                continue
+            except Exception as e:
+                print(f"✗ {scanner_name}: cached result unreadable, running scanner: {str(e)}")
+        elif scanner_name not in to_run:
+            print(f"… {scanner_name}: postponed, no previous result")
+            continue
+        
+        started = datetime.utcnow()
+        API_COUNTER.start()
+        scan_data, error = run_scanner(
+            scanner_name, scanner, scanner_event, context,
+            writer=writer, top=top, inline_limit=inline_budget, graph=graph
+        )
+        calls = API_COUNTER.stop()
+        if scan_data is not None:
+            inline_budget -= len(scan_data['findings'])
+        
+        if runs is not None:
+            try:
+                runtime = (datetime.utcnow() - started).total_seconds()
+                scan_cost += record_run(scanner_name, started, runtime, calls, scan_data, error, scan_id)
+            except Exception as e:
+                print(f"Scanner run not recorded: {str(e)}")
+        ran.append(scanner_name)
+    
+        if scan_data is not None:
+            all_results.append(scan_data)
+        else:
+            scan_errors.append(error)
+    
+    # Shared inventory fetches are their own cost line, not any one scanner's
+    inventory_calls = {}
+    if graph is not None:
+        inventory_calls = graph.inventory.api_calls
+        scan_cost += estimate_api_cost(inventory_calls)
+        try:
+            graph.inventory.save()
+        except Exception as e:
+            print(f"Inventory cache not saved: {str(e)}")
+        graph.inventory.close()
+    
+    report_location = None
+    if writer is not None:
+        try:
+            report_location = writer.close()
         except Exception as e:
-            scan_errors.append({
-                'scanner': scanner_name,
-                'error': str(e)
-            })
-            print(f"✗ {scanner_name}: Exception - {str(e)}")
+            print(f"Report upload failed: {str(e)}")
     
     # Create consolidated report
-    report = {
-        'scan_timestamp': datetime.utcnow().isoformat(),
-        'scan_status': 'completed' if not scan_errors else 'completed_with_errors',
-        'summary': {
-            'total_scanners_run': len(scanners),
-            'total_scanners_succeeded': len(all_results),
-            'total_scanners_failed': len(scan_errors),
-            'total_findings': sum(r['total_findings'] for r in all_results),
-            'total_monthly_savings_usd': round(total_monthly_savings, 2),
-            'total_annual_savings_usd': round(total_annual_savings, 2)
-        },
-        'detailed_results': all_results,
-        'errors': scan_errors
+    report = build_report(all_results, scan_errors)
+    report['scheduling'] = {
+        'ran': ran,
+        'reused': reused,
+        'postponed': postponed,
+        'inventory_api_calls': inventory_calls,
+        'estimated_api_cost_usd': round(scan_cost, 6)
     }
+    report['report_location'] = report_location
+    
+    # Record where the scan ran (context is None when run locally)
+    if getattr(context, 'invoked_function_arn', None):
+        report['account_id'] = context.invoked_function_arn.split(':')[4]
+    report['region'] = os.environ.get('AWS_REGION')
     
     # Print summary
     print("\n" + "="*60)
@@ -89,18 +188,159 @@ def lambda_handler(event, context):
     
     # Save to DynamoDB (if table exists)
     try:
-        save_to_dynamodb(report)
+        save_to_dynamodb(report, scan_id, top.findings())
     except Exception as e:
         print(f"Note: Could not save to DynamoDB (table may not exist yet): {str(e)}")
     
+    # Append findings to the columnar archive (if configured)
+    archive_path = os.environ.get('ARCHIVE_PATH')
+    if archive_path:
+        try:
+            write_archive(scan_id, report, archive_path)
+        except Exception as e:
+            print(f"Archive write skipped: {str(e)}")
+    
+    # The index, tag index and archive above read the report's local spool
+    if writer is not None:
+        try:
+            writer.remove_spool()
+        except Exception as e:
+            print(f"Report spool not removed: {str(e)}")
+    
     return {
         'statusCode': 200,
         'body': json.dumps(report, indent=2)
     }
 
-def save_to_dynamodb(report):
+def stream_findings(scanner_name, source, findings, writer=None, top=None, inline_limit=None):
+    """
+    Consume findings one at a time into running totals and return the
+    totals and findings fields of a result
+
+    With a writer, each finding is also streamed to the report and only the
+    first inline_limit are kept inline; the result then points at the report.
+    If the findings raise midway, the lines already streamed are rolled back
+    and top is left untouched, so a failed scanner adds nothing to the scan.
+    """
+    kept = []
+    total_findings = 0
+    total_monthly = 0
+    total_annual = 0
+    scanner_top = RunningTopFindings(top.n) if top is not None else None
+    mark = writer.mark() if writer is not None else None
+    
+    try:
+        for finding in findings:
+            total_findings += 1
+            total_monthly += finding['monthly_cost_usd']
+            total_annual += finding['annual_savings_usd']
+            
+            if writer is not None:
+                writer.write(scanner_name, finding)
+            if scanner_top is not None:
+                scanner_top.add(source, finding)
+            if writer is None or inline_limit is None or len(kept) < inline_limit:
+                kept.append(finding)
+    except Exception:
+        if writer is not None:
+            writer.rollback(mark)
+        raise
+    
+    if top is not None:
+        top.merge(scanner_top)
+    
+    streamed = {
+        'total_findings': total_findings,
+        'total_monthly_savings_usd': round(total_monthly, 2),
+        'total_annual_savings_usd': round(total_annual, 2),
+        'findings': kept
+    }
+    if len(kept) < total_findings:
+        streamed['findings_truncated'] = True
+        streamed['findings_location'] = writer.location
+        streamed['scanner'] = scanner_name
+    return streamed
+
+def run_scanner(scanner_name, scanner, event, context, writer=None, top=None, inline_limit=None, graph=None, session=None):
+    """
+    Run a single scanner and return (scan_data, error)
+    Exactly one of the two is None
+    
+    Findings are streamed into the result (see stream_findings).
+    A shared resource graph replaces the scanner's own Describe* calls.
+    The scanner creates its clients from session if one is given.
+    """
+    source = {'service': scanner.SERVICE, 'finding_type': scanner.FINDING_TYPE}
+    stats = {}
+    
+    try:
+        print(f"Running {scanner_name} scanner...")
+        
+        streamed = stream_findings(
+            scanner_name, source, scanner.scan(event, stats, graph, session),
+            writer=writer, top=top, inline_limit=inline_limit
+        )
+        scan_data = {
+            'scan_timestamp': datetime.utcnow().isoformat(),
+            **source,
+            **stats,
+            **streamed
+        }
+        
+        print(f"✓ {scanner_name}: Found {scan_data['total_findings']} issues")
+        return scan_data, None
+        
+    except Exception as e:
+        print(f"✗ {scanner_name}: Exception - {str(e)}")
+        return None, {
+            'scanner': scanner_name,
+            'error': str(e)
+        }
+
+def reuse_result(scanner_name, cached, writer=None, top=None, inline_limit=None):
+    """
+    Carry a cached scanner result into the current scan
+
+    Its findings, inline or read back from the earlier report, are streamed
+    like fresh ones, so the current report holds every finding of the scan.
+    Raises if the cached findings cannot be read.
+    """
+    source = {'service': cached.get('service'), 'finding_type': cached.get('finding_type')}
+    streamed = stream_findings(
+        scanner_name, source, (finding for _, finding in iter_findings([cached])),
+        writer=writer, top=top, inline_limit=inline_limit
+    )
+    return {
+        **{key: value for key, value in cached.items() if key not in FINDINGS_FIELDS},
+        **streamed
+    }
+
+def build_report(all_results, scan_errors):
+    """
+    Build the consolidated report from individual scanner results
+    """
+    total_monthly_savings = sum(r.get('total_monthly_savings_usd', 0) for r in all_results)
+    total_annual_savings = sum(r.get('total_annual_savings_usd', 0) for r in all_results)
+    
+    return {
+        'scan_timestamp': datetime.utcnow().isoformat(),
+        'scan_status': 'completed' if not scan_errors else 'completed_with_errors',
+        'summary': {
+            'total_scanners_run': len(all_results) + len(scan_errors),
+            'total_scanners_succeeded': len(all_results),
+            'total_scanners_failed': len(scan_errors),
+            'total_findings': sum(r['total_findings'] for r in all_results),
+            'total_monthly_savings_usd': round(total_monthly_savings, 2),
+            'total_annual_savings_usd': round(total_annual_savings, 2)
+        },
+        'detailed_results': all_results,
+        'errors': scan_errors
+    }
+
+def save_to_dynamodb(report, scan_id=None, top=None):
     """
     Save scan results to DynamoDB
+    top is the pre-sorted top findings list, computed from the report if omitted
     """
     dynamodb = boto3.resource('dynamodb')
     
@@ -112,12 +352,16 @@ def save_to_dynamodb(report):
         
         # Prepare item for DynamoDB
         item = {
-            'scan_id': f"scan_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+            'scan_id': scan_id or f"scan_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
             'timestamp': report['scan_timestamp'],
+            'account_id': report.get('account_id', 'default'),
             'total_findings': report['summary']['total_findings'],
             'monthly_savings': str(report['summary']['total_monthly_savings_usd']),
             'annual_savings': str(report['summary']['total_annual_savings_usd']),
             'detailed_results': json.dumps(report['detailed_results']),
+            # Pre-sorted by monthly cost so top-N queries skip detailed_results
+            'top_findings': json.dumps(top if top is not None else top_findings(report)),
+            'scheduling': json.dumps(report.get('scheduling', {})),
             'status': report['scan_status']
         }
         
@@ -127,6 +371,37 @@ def save_to_dynamodb(report):
     except Exception as e:
         # Table doesn't exist yet, that's okay
         print(f"DynamoDB save skipped: {str(e)}")
+        return None
+    
+    # Point LATEST at this scan unless a newer one got there first
+    try:
+        table.put_item(
+            Item={**LATEST_SCAN_KEY, 'latest_scan_id': item['scan_id'], 'latest_timestamp': item['timestamp']},
+            ConditionExpression='attribute_not_exists(latest_timestamp) OR latest_timestamp <= :ts',
+            ExpressionAttributeValues={':ts': item['timestamp']}
+        )
+    except Exception as e:
+        print(f"Latest scan pointer not updated: {str(e)}")
+    
+    # Keep the per-resource history up to date
+    try:
+        update_findings_index(item['scan_id'], report, dynamodb)
+    except Exception as e:
+        print(f"Findings index update skipped: {str(e)}")
+    
+    # Build the tag index for cost-allocation queries
+    try:
+        save_tag_index(item['scan_id'], report, dynamodb)
+    except Exception as e:
+        print(f"Tag index update skipped: {str(e)}")
+    
+    # Append to the pre-aggregated history used for forecasts
+    try:
+        update_scan_history(item['scan_id'], report, dynamodb)
+    except Exception as e:
+        print(f"Scan history update skipped: {str(e)}")
+    
+    return item['scan_id']
 
 # For local testing
 if __name__ == "__main__":
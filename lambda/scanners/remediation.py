@@ -0,0 +1,274 @@
+"""
+Bulk remediation of scan findings
+
+Turns a saved scan's findings into EC2 actions (delete volume, release
+address, delete snapshot, stop instance) and runs them on a bounded thread
+pool with a per-API rate limit. Dry runs use EC2's DryRun flag, so they
+check permissions without changing anything.
+
+Every result is appended to an NDJSON ledger as soon as it completes. The
+ledger doubles as the checkpoint: re-running with the same ledger skips
+actions that already finished, so an interrupted run resumes where it
+stopped.
+
+Usage:
+    python remediation.py --scan-id scan_20260101_090000                # dry run
+    python remediation.py --report reports/scan_x.json --actions delete_volume --execute
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+from findings_index import iter_findings
+
+# Finding field -> remediation action, checked in order (snapshot findings
+# also carry the source volume_id)
+ACTION_FIELDS = [
+    ('snapshot_id', 'delete_snapshot'),
+    ('instance_id', 'stop_instance'),
+    ('allocation_id', 'release_address'),
+    ('volume_id', 'delete_volume')
+]
+
+# Default calls per second for each EC2 API
+DEFAULT_RATE_LIMITS = {
+    'delete_volume': 5.0,
+    'delete_snapshot': 5.0,
+    'release_address': 5.0,
+    'stop_instance': 2.0
+}
+
+# Outcomes that need no further attempt on resume
+COMPLETED_STATUSES = {'succeeded', 'already_gone', 'dry_run_ok'}
+
+NOT_FOUND_ERRORS = {
+    'InvalidVolume.NotFound',
+    'InvalidSnapshot.NotFound',
+    'InvalidAllocationID.NotFound',
+    'InvalidInstanceID.NotFound'
+}
+
+THROTTLING_ERRORS = {'RequestLimitExceeded', 'Throttling', 'ThrottlingException'}
+
+MAX_ATTEMPTS = 5
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at a fixed rate per second"""
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(self.next_slot, now) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+def build_actions(detailed_results, allowed_actions=None):
+    """
+    Map findings to remediation actions, one per resource
+    """
+    actions = {}
+    for result, finding in iter_findings(detailed_results):
+        for field, action in ACTION_FIELDS:
+            resource_id = finding.get(field)
+            if resource_id and resource_id != 'N/A':
+                break
+        else:
+            continue
+
+        if allowed_actions and action not in allowed_actions:
+            continue
+
+        action_id = f"{action}:{resource_id}"
+        actions[action_id] = {
+            'action_id': action_id,
+            'action': action,
+            'resource_id': resource_id,
+            'service': result.get('service'),
+            'monthly_cost_usd': finding.get('monthly_cost_usd', 0)
+        }
+    return list(actions.values())
+
+def call_api(ec2, action, resource_id, dry_run):
+    """
+    Issue the EC2 call for one action
+    """
+    if action == 'delete_volume':
+        return ec2.delete_volume(VolumeId=resource_id, DryRun=dry_run)
+    if action == 'delete_snapshot':
+        return ec2.delete_snapshot(SnapshotId=resource_id, DryRun=dry_run)
+    if action == 'release_address':
+        return ec2.release_address(AllocationId=resource_id, DryRun=dry_run)
+    if action == 'stop_instance':
+        return ec2.stop_instances(InstanceIds=[resource_id], DryRun=dry_run)
+    raise ValueError(f"Unknown remediation action: {action}")
+
+def execute_action(ec2, action, dry_run, limiter):
+    """
+    Run one action with throttling retries and return its ledger entry
+    """
+    entry = {
+        **action,
+        'dry_run': dry_run,
+        'attempts': 0
+    }
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        entry['attempts'] = attempt
+        limiter.acquire()
+        try:
+            call_api(ec2, action['action'], action['resource_id'], dry_run)
+            entry['status'] = 'succeeded'
+            break
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code == 'DryRunOperation':
+                # Request would have succeeded
+                entry['status'] = 'dry_run_ok'
+            elif code in NOT_FOUND_ERRORS:
+                entry['status'] = 'already_gone'
+            elif code in THROTTLING_ERRORS and attempt < MAX_ATTEMPTS:
+                time.sleep(min(2 ** attempt * 0.1, 5))
+                continue
+            else:
+                entry['status'] = 'failed'
+                entry['error'] = f"{code}: {e.response['Error'].get('Message', '')}"
+            break
+        except Exception as e:
+            entry['status'] = 'failed'
+            entry['error'] = str(e)
+            break
+
+    entry['completed_at'] = datetime.utcnow().isoformat()
+    return entry
+
+def load_checkpoint(ledger_path, dry_run):
+    """
+    Return the action IDs already completed in this mode according to the ledger
+    """
+    completed = set()
+    if not os.path.exists(ledger_path):
+        return completed
+
+    with open(ledger_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry.get('dry_run') == dry_run and entry.get('status') in COMPLETED_STATUSES:
+                completed.add(entry['action_id'])
+    return completed
+
+def run_remediation(actions, ec2, ledger_path, dry_run=True, max_workers=8, rate_limits=None):
+    """
+    Execute actions in parallel, appending each result to the ledger
+
+    Actions already completed according to the ledger are skipped.
+    Returns a summary with counts per status.
+    """
+    rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+    limiters = {action: RateLimiter(rate) for action, rate in rate_limits.items()}
+
+    completed = load_checkpoint(ledger_path, dry_run)
+    pending = [a for a in actions if a['action_id'] not in completed]
+    print(f"{len(actions)} actions, {len(completed & {a['action_id'] for a in actions})} already done, "
+          f"{len(pending)} to run ({'DRY RUN' if dry_run else 'EXECUTE'})")
+
+    counts = {}
+    ledger_lock = threading.Lock()
+
+    def run_one(action):
+        entry = execute_action(ec2, action, dry_run, limiters[action['action']])
+        with ledger_lock:
+            ledger.write(json.dumps(entry) + '\n')
+            ledger.flush()
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        return entry
+
+    with open(ledger_path, 'a') as ledger:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            entries = list(pool.map(run_one, pending))
+
+    saved = sum(
+        float(e.get('monthly_cost_usd', 0))
+        for e in entries if e['status'] == 'succeeded'
+    )
+    return {
+        'dry_run': dry_run,
+        'total_actions': len(actions),
+        'skipped_completed': len(actions) - len(pending),
+        'status_counts': counts,
+        'monthly_savings_realized_usd': round(saved, 2),
+        'ledger': ledger_path
+    }
+
+def load_scan(scan_id, dynamodb=None):
+    """
+    Load a saved scan's detailed_results from DynamoDB
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    item = dynamodb.Table('cost-optimizer-scans').get_item(Key={'scan_id': scan_id}).get('Item')
+    if not item:
+        raise ValueError(f"Scan not found: {scan_id}")
+    detailed_results = item.get('detailed_results', [])
+    if isinstance(detailed_results, str):
+        detailed_results = json.loads(detailed_results)
+    return detailed_results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Remediate findings from a saved scan')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--scan-id', help='Scan to remediate from the cost-optimizer-scans table')
+    source.add_argument('--report', help='Report JSON written by local_runner.py')
+    parser.add_argument('--actions', help=f"Comma-separated subset of: {', '.join(DEFAULT_RATE_LIMITS)}")
+    parser.add_argument('--execute', action='store_true', help='Actually make changes (default is a dry run)')
+    parser.add_argument('--ledger', help='NDJSON ledger/checkpoint file (default: remediation-<source>.jsonl)')
+    parser.add_argument('--workers', type=int, default=8, help='Maximum concurrent API calls')
+    parser.add_argument('--region', help='Region of the resources')
+    args = parser.parse_args(argv)
+
+    allowed = {name.strip() for name in args.actions.split(',') if name.strip()} if args.actions else None
+    unknown = (allowed or set()) - set(DEFAULT_RATE_LIMITS)
+    if unknown:
+        parser.error(f"unknown --actions: {', '.join(sorted(unknown))} (choose from {', '.join(DEFAULT_RATE_LIMITS)})")
+
+    if args.report:
+        with open(args.report) as f:
+            report = json.load(f)
+        detailed_results = report['detailed_results']
+        region = args.region or report.get('region')
+        label = os.path.splitext(os.path.basename(args.report))[0]
+    else:
+        detailed_results = load_scan(args.scan_id)
+        region = args.region
+        label = args.scan_id
+
+    actions = build_actions(detailed_results, allowed)
+    ledger_path = args.ledger or f"remediation-{label}.jsonl"
+
+    summary = run_remediation(
+        actions,
+        boto3.client('ec2', region_name=region),
+        ledger_path,
+        dry_run=not args.execute,
+        max_workers=args.workers
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['status_counts'].get('failed') else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Streaming NDJSON report writer
+
+The master scanner writes every finding to an NDJSON file as soon as a
+scanner yields it, one {"scanner": ..., "finding": {...}} line each, so
+the full list of findings never has to be held in memory. Only running
+totals, a bounded top-N and a limited number of inline findings stay in
+the report; results whose findings did not fit inline point at this file.
+
+The destination is a local directory or s3://bucket/prefix. S3 reports
+are spooled to a temporary file and uploaded (multipart for large files)
+when the writer is closed. The master scanner only streams when
+REPORT_PATH is on S3, since saved scans must be able to read the report
+back after the invocation.
+"""
+import boto3
+import json
+import os
+import tempfile
+import threading
+
+def split_s3_uri(uri):
+    """
+    Return (bucket, key) for an s3://bucket/key URI
+    """
+    bucket, _, key = uri[len('s3://'):].partition('/')
+    return bucket, key
+
+class NdjsonReportWriter:
+    """Appends findings to a per-scan NDJSON file, safe to share between threads"""
+
+    def __init__(self, scan_id, report_path=None):
+        report_path = report_path or tempfile.gettempdir()
+        filename = f"{scan_id}.ndjson"
+
+        if report_path.startswith('s3://'):
+            self.local_path = os.path.join(tempfile.gettempdir(), filename)
+            self.location = f"{report_path.rstrip('/')}/{filename}"
+        else:
+            os.makedirs(report_path, exist_ok=True)
+            self.local_path = os.path.join(report_path, filename)
+            self.location = self.local_path
+
+        self.file = open(self.local_path, 'w')
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def write(self, scanner_name, finding):
+        line = json.dumps({'scanner': scanner_name, 'finding': finding}, default=str)
+        with self.lock:
+            self.file.write(line + '\n')
+            self.count += 1
+
+    def mark(self):
+        """
+        Current end of the report, to roll back to if a scanner fails
+        """
+        with self.lock:
+            self.file.flush()
+            return self.file.tell(), self.count
+
+    def rollback(self, mark):
+        """
+        Drop every line written since mark, e.g. a failed scanner's partial findings
+        Only safe while no other scanner writes to the report
+        """
+        position, count = mark
+        with self.lock:
+            self.file.flush()
+            self.file.seek(position)
+            self.file.truncate()
+            self.count = count
+
+    def close(self):
+        """
+        Flush the file, upload it if the destination is S3 and return its location
+        """
+        self.file.close()
+        if self.location.startswith('s3://'):
+            bucket, key = split_s3_uri(self.location)
+            # upload_file switches to multipart uploads for large reports
+            boto3.client('s3').upload_file(self.local_path, bucket, key)
+            print(f"✓ Streamed {self.count} findings to {self.location}")
+        return self.location
+
+    def remove_spool(self):
+        """
+        Delete the temporary copy of an S3 report once nothing reads it anymore
+        """
+        if self.location.startswith('s3://') and os.path.exists(self.local_path):
+            os.remove(self.local_path)
+
+def iter_report_lines(location):
+    """
+    Yield the parsed lines of an NDJSON report, local file or S3 object
+    A local spool of an S3 report is read instead of downloading it again
+    Raises if the report cannot be read, so findings are never silently lost
+    """
+    local_path = location
+    if location.startswith('s3://'):
+        local_path = os.path.join(tempfile.gettempdir(), os.path.basename(location))
+
+    if os.path.exists(local_path):
+        with open(local_path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    if not location.startswith('s3://'):
+        raise FileNotFoundError(f"Findings report not found: {location}")
+
+    bucket, key = split_s3_uri(location)
+    body = boto3.client('s3').get_object(Bucket=bucket, Key=key)['Body']
+    for line in body.iter_lines():
+        if line.strip():
+            yield json.loads(line)
+
+def read_findings(location, scanner_name):
+    """
+    Stream one scanner's findings back from an NDJSON report
+    """
+    for entry in iter_report_lines(location):
+        if entry['scanner'] == scanner_name:
+            yield entry['finding']
@@ -0,0 +1,156 @@
+"""
+Cross-scanner resource graph
+
+Built once per scan over the run's inventory cache (instances, volumes,
+Elastic IPs and snapshots). Resources are indexed by ID with an adjacency
+set per resource (instance <-> volume <-> snapshot, instance <-> EIP), so
+scanners read their inventory from the graph instead of calling Describe*
+themselves and can price a whole dependency chain: e.g. an idle instance
+together with its volumes, its Elastic IP and the snapshots of those
+volumes. The index is only built, and the inventories it needs only
+fetched, when a scanner first follows a link.
+"""
+import threading
+from collections import defaultdict
+
+from ebs_scanner import calculate_volume_cost
+from eip_scanner import IDLE_EIP_MONTHLY_COST
+from inventory_cache import INVENTORY_TYPES
+from snapshot_scanner import SNAPSHOT_PRICE_PER_GB
+
+class ResourceGraph:
+    """Resources of one account/region indexed by ID, with adjacency by ID"""
+
+    def __init__(self, inventory):
+        self.inventory = inventory
+        self.nodes = None
+        self.adjacency = None
+        self.lock = threading.Lock()
+
+    def resources(self, resource_type):
+        """All resources of a type, in Describe* order"""
+        return self.inventory.get(resource_type)
+
+    def build_index(self):
+        """
+        Index every resource and link related ones, on first use
+        """
+        with self.lock:
+            if self.nodes is not None:
+                return
+            # Fetch whatever is still missing concurrently
+            self.inventory.prefetch(*INVENTORY_TYPES)
+            self.nodes, self.adjacency = build_index(
+                {resource_type: self.inventory.get(resource_type) for resource_type in INVENTORY_TYPES}
+            )
+            print(f"✓ Resource graph: {len(self.nodes)} resources")
+
+    def get(self, resource_id):
+        self.build_index()
+        node = self.nodes.get(resource_id)
+        return node[1] if node else None
+
+    def neighbors(self, resource_id, resource_type):
+        """Linked resources of one type, sorted by ID; unknown IDs are skipped"""
+        self.build_index()
+        return [
+            self.nodes[other][1]
+            for other in sorted(self.adjacency.get(resource_id, ()))
+            if other in self.nodes and self.nodes[other][0] == resource_type
+        ]
+
+    def volume_steps(self, volume_id):
+        """
+        Steps to remove a volume and the snapshots taken from it
+        """
+        steps = []
+        volume = self.get(volume_id)
+        if volume:
+            steps.append({
+                'action': 'delete_volume',
+                'resource_id': volume_id,
+                'monthly_cost_usd': round(calculate_volume_cost(volume['Size'], volume['VolumeType']), 2)
+            })
+        for snapshot in self.neighbors(volume_id, 'snapshot'):
+            steps.append({
+                'action': 'delete_snapshot',
+                'resource_id': snapshot['SnapshotId'],
+                'monthly_cost_usd': round(snapshot['VolumeSize'] * SNAPSHOT_PRICE_PER_GB, 2)
+            })
+        return steps
+
+    def instance_chain(self, instance_id, instance_monthly_cost):
+        """
+        Steps to fully retire an instance: stop it, release its Elastic IPs
+        (charged once the instance is stopped) and delete its volumes with
+        their snapshots
+        """
+        steps = [{
+            'action': 'stop_instance',
+            'resource_id': instance_id,
+            'monthly_cost_usd': round(instance_monthly_cost, 2)
+        }]
+        for address in self.neighbors(instance_id, 'address'):
+            steps.append({
+                'action': 'release_address',
+                'resource_id': address['AllocationId'],
+                'monthly_cost_usd': IDLE_EIP_MONTHLY_COST
+            })
+        for volume in self.neighbors(instance_id, 'volume'):
+            steps.extend(self.volume_steps(volume['VolumeId']))
+        return summarize_chain(steps)
+
+    def volume_chain(self, volume_id):
+        """
+        Dependency chain of an unattached volume and its snapshots
+        """
+        return summarize_chain(self.volume_steps(volume_id))
+
+    def snapshot_source(self, snapshot_id):
+        """
+        The volume a snapshot was taken from, or None if it no longer exists
+        """
+        volumes = self.neighbors(snapshot_id, 'volume')
+        return volumes[0] if volumes else None
+
+def summarize_chain(steps):
+    """
+    Dependency chain entry added to a finding
+    Informational: chain steps can overlap other findings, so chain savings
+    are not added to the scan totals
+    """
+    return {
+        'steps': steps,
+        'monthly_savings_usd': round(sum(step['monthly_cost_usd'] for step in steps), 2),
+        'summary': ', '.join(f"{step['action']} {step['resource_id']}" for step in steps)
+    }
+
+def build_index(inventory):
+    """
+    Return (nodes, adjacency) for an inventory: nodes maps each resource ID
+    to (resource_type, resource), adjacency each ID to its linked IDs
+    """
+    nodes = {}
+    adjacency = defaultdict(set)
+
+    def link(a, b):
+        if a and b:
+            adjacency[a].add(b)
+            adjacency[b].add(a)
+
+    for instance in inventory['instance']:
+        nodes[instance['InstanceId']] = ('instance', instance)
+        for mapping in instance.get('BlockDeviceMappings', []):
+            link(instance['InstanceId'], mapping.get('Ebs', {}).get('VolumeId'))
+    for volume in inventory['volume']:
+        nodes[volume['VolumeId']] = ('volume', volume)
+        for attachment in volume.get('Attachments', []):
+            link(volume['VolumeId'], attachment.get('InstanceId'))
+    for address in inventory['address']:
+        nodes[address['AllocationId']] = ('address', address)
+        link(address['AllocationId'], address.get('InstanceId'))
+    for snapshot in inventory['snapshot']:
+        nodes[snapshot['SnapshotId']] = ('snapshot', snapshot)
+        link(snapshot['SnapshotId'], snapshot.get('VolumeId'))
+
+    return nodes, adjacency
@@ -0,0 +1,163 @@
+"""
+Pre-aggregated scan history for trend analysis
+
+Each series (one per account and service, plus an ALL series per account,
+in cost-optimizer-scan-history) holds one point per day: timestamp,
+findings and monthly savings of the day's latest scan. The first scan of
+a day appends a point and later scans that day overwrite it, so hourly
+invocations that mostly reuse cached scanner results do not flood the
+series with duplicate points. A series is a single item holding parallel
+lists capped at MAX_HISTORY_POINTS (days), so the summary API reads a
+handful of small items instead of every scan's detailed_results.
+
+Usage (rebuild the series from existing scans):
+    python scan_history.py --backfill
+"""
+import argparse
+import json
+import sys
+from decimal import Decimal
+
+import boto3
+
+from scan_scheduler import LATEST_SCAN_KEY
+
+SCAN_HISTORY_TABLE = 'cost-optimizer-scan-history'
+
+# Service name of the per-account total series
+ALL_SERVICES = 'ALL'
+
+# Oldest daily points are dropped beyond this many per series
+MAX_HISTORY_POINTS = 365
+
+def service_totals(report):
+    """
+    Findings and monthly savings per service from a report's scanner totals
+    """
+    totals = {ALL_SERVICES: [0, 0.0]}
+    for result in report['detailed_results']:
+        service = result.get('service', 'Unknown')
+        for key in (service, ALL_SERVICES):
+            totals.setdefault(key, [0, 0.0])
+            totals[key][0] += int(result.get('total_findings', 0))
+            totals[key][1] += float(result.get('total_monthly_savings_usd', 0))
+    return totals
+
+def update_scan_history(scan_id, report, dynamodb=None):
+    """
+    Record the report's per-service totals as the day's point of each series
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    table = dynamodb.Table(SCAN_HISTORY_TABLE)
+    account_id = report.get('account_id', 'default')
+    timestamp = report['scan_timestamp']
+
+    for service, (findings, savings) in service_totals(report).items():
+        series = f"{account_id}#{service}"
+        stamps = table.get_item(
+            Key={'series': series},
+            ProjectionExpression='timestamps'
+        ).get('Item', {}).get('timestamps', [])
+
+        if stamps and stamps[-1][:10] == timestamp[:10]:
+            # Another scan today: replace the day's point
+            last = len(stamps) - 1
+            table.update_item(
+                Key={'series': series},
+                UpdateExpression=(
+                    f"SET last_scan_id = :scan_id, timestamps[{last}] = :timestamp, "
+                    f"findings[{last}] = :findings, savings[{last}] = :savings"
+                ),
+                ExpressionAttributeValues={
+                    ':scan_id': scan_id,
+                    ':timestamp': timestamp,
+                    ':findings': findings,
+                    ':savings': Decimal(str(round(savings, 2)))
+                }
+            )
+            continue
+
+        updated = table.update_item(
+            Key={'series': series},
+            UpdateExpression=(
+                'SET account_id = :account_id, #service = :service, last_scan_id = :scan_id, '
+                'timestamps = list_append(if_not_exists(timestamps, :empty), :timestamp), '
+                'findings = list_append(if_not_exists(findings, :empty), :findings), '
+                'savings = list_append(if_not_exists(savings, :empty), :savings)'
+            ),
+            ExpressionAttributeNames={'#service': 'service'},
+            ExpressionAttributeValues={
+                ':account_id': account_id,
+                ':service': service,
+                ':scan_id': scan_id,
+                ':empty': [],
+                ':timestamp': [timestamp],
+                ':findings': [findings],
+                ':savings': [Decimal(str(round(savings, 2)))]
+            },
+            ReturnValues='UPDATED_NEW'
+        )['Attributes']
+
+        excess = len(updated['timestamps']) - MAX_HISTORY_POINTS
+        if excess > 0:
+            indexes = range(excess)
+            table.update_item(
+                Key={'series': series},
+                UpdateExpression='REMOVE ' + ', '.join(
+                    f"{field}[{i}]" for field in ('timestamps', 'findings', 'savings') for i in indexes
+                )
+            )
+
+    print(f"✓ Scan history updated in DynamoDB table: {SCAN_HISTORY_TABLE}")
+
+def backfill_scan_history(dynamodb=None):
+    """
+    Rebuild every series from the scans table, oldest scan first
+    (the last scan of each day gives that day's point)
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    history = dynamodb.Table(SCAN_HISTORY_TABLE)
+    scans = dynamodb.Table('cost-optimizer-scans')
+
+    with history.batch_writer() as batch:
+        for item in history.scan(ProjectionExpression='series').get('Items', []):
+            batch.delete_item(Key={'series': item['series']})
+
+    items = []
+    kwargs = {
+        'ProjectionExpression': 'scan_id, #ts, account_id, detailed_results',
+        'FilterExpression': 'scan_id <> :latest',
+        'ExpressionAttributeNames': {'#ts': 'timestamp'},
+        'ExpressionAttributeValues': {':latest': LATEST_SCAN_KEY['scan_id']}
+    }
+    while True:
+        response = scans.scan(**kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    items.sort(key=lambda item: item.get('timestamp', ''))
+    for item in items:
+        detailed_results = item.get('detailed_results', [])
+        if isinstance(detailed_results, str):
+            detailed_results = json.loads(detailed_results)
+        report = {
+            'scan_timestamp': item['timestamp'],
+            'account_id': item.get('account_id', 'default'),
+            'detailed_results': detailed_results
+        }
+        update_scan_history(item['scan_id'], report, dynamodb)
+    return len(items)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain the pre-aggregated scan history')
+    parser.add_argument('--backfill', action='store_true', help='Rebuild all series from cost-optimizer-scans')
+    args = parser.parse_args(argv)
+
+    if args.backfill:
+        print(f"Backfilled {backfill_scan_history()} scans")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
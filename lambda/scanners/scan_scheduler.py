@@ -0,0 +1,222 @@
+"""
+Per-scanner scan cadence with cost-of-scan tracking
+
+The master scanner is invoked on one frequent schedule; this module decides
+which scanners are actually due. Each scanner has its own interval (cheap
+EIP checks run often, the CloudWatch-heavy EC2 scan rarely). Every run's
+runtime, API calls and estimated API cost are recorded together with its
+result totals and the scan it ran in (cost-optimizer-scanner-runs), so
+scanners that are not due reuse their last result, read back from that
+scan, instead of calling AWS again.
+
+An optional per-invocation budget (SCAN_COST_BUDGET_USD) postpones due
+scanners whose last run cost more than what is left. A scanner is never
+postponed once it is a full interval overdue, so cheap scanners that are
+always due cannot starve expensive ones.
+"""
+import boto3
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+SCANNER_RUNS_TABLE = 'cost-optimizer-scanner-runs'
+
+SCANS_TABLE = 'cost-optimizer-scans'
+
+# Item in the scans table pointing at the most recent scan
+LATEST_SCAN_KEY = {'scan_id': 'LATEST'}
+
+# Result fields holding or locating the findings; run records leave them out
+FINDINGS_FIELDS = ('findings', 'findings_truncated', 'findings_location', 'scanner')
+
+# Hours between runs of each scanner (override with SCANNER_INTERVALS JSON)
+DEFAULT_INTERVALS_HOURS = {
+    'EBS Volumes': 6,
+    'EC2 Instances': 24,
+    'Elastic IPs': 1,
+    'EBS Snapshots': 24
+}
+
+# Approximate USD per API call; Describe* calls are free
+API_CALL_COST_USD = {
+    'cloudwatch.GetMetricStatistics': 0.00001,
+    'cloudwatch.GetMetricData': 0.00001
+}
+
+class ApiCallCounter:
+    """
+    Counts AWS API calls per thread through botocore's before-call event
+    Register once on the default session before the scanners create clients
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def register(self, session=None):
+        if session is None:
+            if boto3.DEFAULT_SESSION is None:
+                boto3.setup_default_session()
+            session = boto3.DEFAULT_SESSION
+        session.events.register('before-call', self.on_call, unique_id='cost-optimizer-api-counter')
+
+    def on_call(self, model, **kwargs):
+        calls = getattr(self.local, 'calls', None)
+        if calls is not None:
+            name = f"{model.service_model.service_name}.{model.name}"
+            calls[name] = calls.get(name, 0) + 1
+
+    def start(self):
+        self.local.calls = {}
+
+    def stop(self):
+        calls = getattr(self.local, 'calls', None) or {}
+        self.local.calls = None
+        return calls
+
+def estimate_api_cost(calls):
+    """
+    Estimated USD cost of a set of API call counts
+    """
+    return sum(API_CALL_COST_USD.get(name, 0) * count for name, count in calls.items())
+
+def get_intervals():
+    """
+    Scanner intervals in hours, with SCANNER_INTERVALS overrides applied
+    """
+    intervals = dict(DEFAULT_INTERVALS_HOURS)
+    overrides = os.environ.get('SCANNER_INTERVALS')
+    if overrides:
+        intervals.update({name: float(hours) for name, hours in json.loads(overrides).items()})
+    return intervals
+
+def load_runs(dynamodb=None):
+    """
+    Last recorded run of every scanner, keyed by scanner name
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    response = dynamodb.Table(SCANNER_RUNS_TABLE).scan()
+    return {item['scanner']: item for item in response.get('Items', [])}
+
+def is_due(scanner_name, last_run, now, intervals):
+    """
+    A scanner is due when it never ran, last failed, or its interval elapsed
+    """
+    if not last_run or last_run.get('status') != 'succeeded' or not last_run.get('result'):
+        return True
+    hours = intervals.get(scanner_name, 24)
+    return datetime.fromisoformat(last_run['last_run']) + timedelta(hours=hours) <= now
+
+def overdue_intervals(scanner_name, last_run, now, intervals):
+    """
+    Intervals elapsed since a scanner became due (negative while it is not)
+    Counted from its last successful run; infinite if it never succeeded
+    """
+    if not last_run or not last_run.get('last_run'):
+        return float('inf')
+    hours = intervals.get(scanner_name, 24)
+    elapsed = now - datetime.fromisoformat(last_run['last_run'])
+    return elapsed / timedelta(hours=hours) - 1
+
+def plan_scanners(scanner_names, runs, now, intervals, force=False, budget_usd=None):
+    """
+    Split scanners into (to_run, to_reuse, postponed)
+
+    Due scanners run cheapest-first by the cost of their last run; with a
+    budget, the ones that no longer fit are postponed to the next invocation
+    and their last result is reused if there is one. Scanners a full
+    interval or more overdue go first and are never postponed.
+    """
+    due = [name for name in scanner_names if force or is_due(name, runs.get(name), now, intervals)]
+    fresh = [name for name in scanner_names if name not in due]
+
+    overdue = {name: overdue_intervals(name, runs.get(name), now, intervals) >= 1 for name in due}
+    due.sort(key=lambda name: (not overdue[name], float(runs.get(name, {}).get('estimated_api_cost_usd', 0))))
+    to_run, postponed = [], []
+    remaining = budget_usd
+    for name in due:
+        expected = float(runs.get(name, {}).get('estimated_api_cost_usd', 0))
+        if remaining is not None and expected > max(remaining, 0) and to_run and not overdue[name]:
+            postponed.append(name)
+            continue
+        to_run.append(name)
+        if remaining is not None:
+            remaining -= expected
+
+    reuse = fresh + [name for name in postponed if runs.get(name, {}).get('result')]
+    return to_run, reuse, postponed
+
+def load_scan_findings(result, dynamodb=None):
+    """
+    The findings fields of a result as saved with the scan it ran in
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    item = dynamodb.Table(SCANS_TABLE).get_item(
+        Key={'scan_id': result['source_scan_id']},
+        ProjectionExpression='detailed_results'
+    ).get('Item')
+    if not item:
+        raise ValueError(f"Scan {result['source_scan_id']} not found")
+
+    detailed_results = item.get('detailed_results', [])
+    if isinstance(detailed_results, str):
+        detailed_results = json.loads(detailed_results)
+    for saved in detailed_results:
+        if saved.get('service') == result.get('service') and saved.get('finding_type') == result.get('finding_type'):
+            return {key: saved[key] for key in FINDINGS_FIELDS if key in saved}
+    raise ValueError(f"No {result.get('finding_type')} result in scan {result['source_scan_id']}")
+
+def cached_result(run, dynamodb=None):
+    """
+    A scanner's stored result, marked as reused
+    Its findings come from the scan the run was saved with
+    """
+    result = json.loads(run['result'])
+    if 'findings' not in result:
+        result.update(load_scan_findings(result, dynamodb))
+    result['cached'] = True
+    return result
+
+def record_run(scanner_name, started, runtime_seconds, calls, scan_data, error=None, scan_id=None, dynamodb=None):
+    """
+    Store a scanner run's timing, API usage and result
+
+    Only the result's totals and the ID of the scan it is saved with are
+    stored, never its findings, so the item stays far below DynamoDB's
+    400 KB limit. A failed run keeps the previous result so it can still
+    be reused.
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    table = dynamodb.Table(SCANNER_RUNS_TABLE)
+    cost = estimate_api_cost(calls)
+
+    update = (
+        'SET last_attempt = :started, runtime_seconds = :runtime, api_calls = :calls, '
+        'total_api_calls = :total, estimated_api_cost_usd = :cost, #status = :status'
+    )
+    values = {
+        ':started': started.isoformat(),
+        ':runtime': Decimal(str(round(runtime_seconds, 3))),
+        ':calls': calls,
+        ':total': sum(calls.values()),
+        ':cost': Decimal(str(round(cost, 6))),
+        ':status': 'failed' if error else 'succeeded'
+    }
+    if error:
+        update += ', last_error = :error'
+        values[':error'] = json.dumps(error)
+    else:
+        update += ', last_run = :started, #result = :result'
+        values[':result'] = json.dumps({
+            **{key: value for key, value in scan_data.items() if key not in FINDINGS_FIELDS},
+            'source_scan_id': scan_id
+        })
+
+    table.update_item(
+        Key={'scanner': scanner_name},
+        UpdateExpression=update,
+        ExpressionAttributeNames={'#status': 'status', **({} if error else {'#result': 'result'})},
+        ExpressionAttributeValues=values
+    )
+    return cost
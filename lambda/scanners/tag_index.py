@@ -0,0 +1,130 @@
+"""
+Inverted tag index for scan findings
+
+Built once when a scan is saved so the API can filter and roll up savings
+by any tag (team, env, ...) without decoding the scan's detailed_results.
+Items live in one DynamoDB table keyed by (scan_id, tag):
+
+    scan_id=<id>, tag='__keys__'                 tag keys with finding counts and savings
+    scan_id=<id>, tag='key#team#0000'            rollup rows {value, findings, monthly_savings}
+    scan_id=<id>, tag='tag#team=web#0000'        findings carrying team=web
+    scan_id='LATEST', tag='pointer'              scan_id of the most recent indexed scan
+
+Rollup and finding lists are split into numbered chunks by encoded size so
+high-cardinality tags and large accounts stay under DynamoDB's 400KB item
+limit; readers Query on the key prefix. '%', '=' and '#' in tag keys and
+values are percent-escaped in sort keys so 'a=b' / 'c' and 'a' / 'b=c'
+never share an item.
+"""
+import boto3
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from findings_index import get_resource_id, iter_findings
+
+TAG_INDEX_TABLE = 'cost-optimizer-tag-index'
+
+KEYS_SORT_KEY = '__keys__'
+LATEST_SCAN_KEY = {'scan_id': 'LATEST', 'tag': 'pointer'}
+
+# Encoded bytes of rows per chunk item, leaving headroom under 400KB for
+# the keys and DynamoDB's per-attribute overhead
+MAX_CHUNK_BYTES = 300000
+
+def escape_tag_part(text):
+    """
+    Escape the sort key separators in a tag key or value
+    """
+    return text.replace('%', '%25').replace('=', '%3D').replace('#', '%23')
+
+def chunks(rows, max_bytes=MAX_CHUNK_BYTES):
+    """
+    Split a list into consecutive chunks whose JSON-encoded rows total at
+    most max_bytes (a single larger row gets a chunk of its own)
+    """
+    chunk = []
+    size = 0
+    number = 0
+    for row in rows:
+        row_size = len(json.dumps(row, default=str).encode('utf-8'))
+        if chunk and size + row_size > max_bytes:
+            yield number, chunk
+            number += 1
+            chunk = []
+            size = 0
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        yield number, chunk
+
+def build_tag_index(report):
+    """
+    Group tagged findings by tag key and value
+
+    Returns {key: {value: [finding_ref, ...]}} where a finding_ref is a
+    compact summary of the finding, enough to list and total it.
+    """
+    index = defaultdict(lambda: defaultdict(list))
+
+    for result, finding in iter_findings(report['detailed_results']):
+        tags = finding.get('tags')
+        if not tags:
+            continue
+
+        ref = {
+            'resource_id': get_resource_id(finding),
+            'service': result.get('service', 'Unknown'),
+            'finding_type': result.get('finding_type', 'Unknown'),
+            'severity': finding.get('severity', 'LOW'),
+            'monthly_cost_usd': Decimal(str(finding.get('monthly_cost_usd', 0)))
+        }
+        for key, value in tags.items():
+            index[key][value].append(ref)
+
+    return index
+
+def save_tag_index(scan_id, report, dynamodb=None):
+    """
+    Write the tag index items for a scan and point LATEST at it
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    table = dynamodb.Table(TAG_INDEX_TABLE)
+    index = build_tag_index(report)
+
+    keys_summary = []
+    with table.batch_writer() as batch:
+        for key, values in index.items():
+            rollup = []
+            for value, refs in values.items():
+                savings = sum(ref['monthly_cost_usd'] for ref in refs)
+                rollup.append({'value': value, 'findings': len(refs), 'monthly_savings': savings})
+
+                for number, chunk in chunks(refs):
+                    batch.put_item(Item={
+                        'scan_id': scan_id,
+                        'tag': f"tag#{escape_tag_part(key)}={escape_tag_part(value)}#{number:04d}",
+                        'findings': chunk
+                    })
+
+            # Largest savings first so the first chunk answers most queries
+            rollup.sort(key=lambda row: row['monthly_savings'], reverse=True)
+            for number, chunk in chunks(rollup):
+                batch.put_item(Item={
+                    'scan_id': scan_id,
+                    'tag': f"key#{escape_tag_part(key)}#{number:04d}",
+                    'values': chunk
+                })
+
+            keys_summary.append({
+                'key': key,
+                'distinct_values': len(rollup),
+                'findings': sum(row['findings'] for row in rollup),
+                'monthly_savings': sum(row['monthly_savings'] for row in rollup)
+            })
+
+        batch.put_item(Item={'scan_id': scan_id, 'tag': KEYS_SORT_KEY, 'keys': keys_summary})
+
+    table.put_item(Item={**LATEST_SCAN_KEY, 'latest_scan_id': scan_id})
+    print(f"✓ Indexed {len(index)} tag keys in DynamoDB table: {TAG_INDEX_TABLE}")
+    return len(index)
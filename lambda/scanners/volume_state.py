@@ -0,0 +1,198 @@
+"""
+Volume state tracking for idle EBS detection
+
+Remembers since when each unattached volume has been available, so the EBS
+scanner can flag only volumes idle longer than a grace period instead of
+every volume detached a minute ago during a deploy.
+
+State is kept in DynamoDB (cost-optimizer-volume-state, partitioned by
+account/region scope) or, when VOLUME_STATE_PATH is set, in one local JSON
+file per account/region under that directory. Each scan only writes the
+volumes that became available and deletes the ones that no longer are.
+Optionally, CloudTrail DetachVolume/CreateVolume records from a local file
+(VOLUME_EVENTS_PATH) give the exact detach time for newly seen volumes.
+Otherwise, with DynamoDB state, a volume that the findings index already
+lists as flagged in the latest indexed scan keeps its idle_since from
+there, so deploying the grace period does not restart known idle clocks.
+"""
+import boto3
+import json
+import os
+import time
+from datetime import datetime
+
+from boto3.dynamodb.conditions import Key
+
+VOLUME_STATE_TABLE = 'cost-optimizer-volume-state'
+
+# Mirrors scanners/findings_index.py (not shipped with the standalone EBS scanner)
+FINDINGS_TABLE = 'cost-optimizer-findings'
+LAST_SCAN_KEY = '__last_scan__'
+BATCH_GET_KEYS = 100
+
+class DynamoDBStateStore:
+    """
+    Volume state kept in a DynamoDB table keyed by (scope, volume_id)
+    Loads and deletes only touch the store's own account/region scope
+    """
+
+    def __init__(self, scope, table_name=VOLUME_STATE_TABLE, dynamodb=None):
+        dynamodb = dynamodb or boto3.resource('dynamodb')
+        self.dynamodb = dynamodb
+        self.scope = scope
+        self.table = dynamodb.Table(table_name)
+
+    def known_idle_since(self, volume_ids):
+        """
+        idle_since from the findings index for volumes flagged in the latest
+        indexed scan; empty if the index does not exist yet
+        """
+        volume_ids = list(volume_ids)
+        items = {}
+        try:
+            for start in range(0, len(volume_ids), BATCH_GET_KEYS - 1):
+                keys = [LAST_SCAN_KEY] + volume_ids[start:start + BATCH_GET_KEYS - 1]
+                request = {FINDINGS_TABLE: {'Keys': [{'resource_id': key} for key in keys]}}
+                for attempt in range(5):
+                    if attempt:
+                        time.sleep(min(0.05 * 2 ** attempt, 2))
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response['Responses'].get(FINDINGS_TABLE, []):
+                        items[item['resource_id']] = item
+                    request = response.get('UnprocessedKeys')
+                    if not request:
+                        break
+        except Exception as e:
+            print(f"Findings index not used for idle clocks: {str(e)}")
+            return {}
+
+        last_scan = items.pop(LAST_SCAN_KEY, {}).get('last_seen')
+        return {
+            volume_id: item['idle_since']
+            for volume_id, item in items.items()
+            if last_scan and item.get('idle_since') and item.get('last_seen', '') >= last_scan
+        }
+
+    def load(self):
+        states = {}
+        kwargs = {'KeyConditionExpression': Key('scope').eq(self.scope)}
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response.get('Items', []):
+                states[item['volume_id']] = item
+            if 'LastEvaluatedKey' not in response:
+                return states
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def apply(self, updates, removed):
+        with self.table.batch_writer() as batch:
+            for state in updates.values():
+                batch.put_item(Item={**state, 'scope': self.scope})
+            for volume_id in removed:
+                batch.delete_item(Key={'scope': self.scope, 'volume_id': volume_id})
+
+class JsonFileStateStore:
+    """Volume state kept in a local JSON file (local runs and tests)"""
+
+    def __init__(self, directory, scope):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"volume-state-{scope}.json")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def known_idle_since(self, volume_ids):
+        # Local runs have no findings index
+        return {}
+
+    def apply(self, updates, removed):
+        states = self.load()
+        states.update(updates)
+        for volume_id in removed:
+            states.pop(volume_id, None)
+        with open(self.path, 'w') as f:
+            json.dump(states, f, indent=2)
+
+def get_state_store(scope, session=None):
+    """
+    Pick the state backend from the environment
+    scope (account_region) keeps the state of different targets apart
+    """
+    directory = os.environ.get('VOLUME_STATE_PATH')
+    if directory:
+        return JsonFileStateStore(directory, scope)
+    return DynamoDBStateStore(scope, dynamodb=(session or boto3).resource('dynamodb'))
+
+def load_detach_events(path):
+    """
+    Read CloudTrail records from a JSON file and return {volume_id: last detach or create time}
+
+    Accepts a CloudTrail log file ({"Records": [...]}) or a plain list of
+    records. Times are returned as naive UTC ISO strings.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    records = data.get('Records', []) if isinstance(data, dict) else data
+
+    detached = {}
+    for record in records:
+        if record.get('eventName') not in ('DetachVolume', 'CreateVolume'):
+            continue
+        params = record.get('requestParameters') or {}
+        elements = record.get('responseElements') or {}
+        volume_id = params.get('volumeId') or elements.get('volumeId')
+        if not volume_id:
+            continue
+        event_time = record['eventTime'].replace('Z', '')
+        if event_time > detached.get(volume_id, ''):
+            detached[volume_id] = event_time
+    return detached
+
+def track_available_volumes(available_ids, store, now, detach_events=None):
+    """
+    Update the stored state with the currently available volumes
+
+    Volumes seen for the first time start their idle clock at their last
+    detach event if one is known, else at their findings index idle_since,
+    otherwise now. Volumes no longer available are dropped.
+    Returns {volume_id: available_since}.
+    """
+    detach_events = detach_events or {}
+    states = store.load()
+    current = set(available_ids)
+
+    new_ids = current - set(states)
+    indexed = store.known_idle_since(new_ids - set(detach_events)) if new_ids else {}
+
+    updates = {}
+    for volume_id in new_ids:
+        event_time = detach_events.get(volume_id)
+        if event_time:
+            since, source = event_time, 'cloudtrail'
+        elif volume_id in indexed:
+            since, source = indexed[volume_id], 'findings_index'
+        else:
+            since, source = now, 'observed'
+        updates[volume_id] = {
+            'volume_id': volume_id,
+            'available_since': since,
+            'source': source,
+            'first_observed': now
+        }
+    removed = set(states) - current
+
+    if updates or removed:
+        store.apply(updates, removed)
+
+    states.update(updates)
+    return {volume_id: states[volume_id]['available_since'] for volume_id in current}
+
+def idle_hours(available_since, now):
+    """
+    Hours between two naive UTC ISO timestamps
+    """
+    delta = datetime.fromisoformat(now) - datetime.fromisoformat(available_since)
+    return max(delta.total_seconds() / 3600, 0)
@@ -0,0 +1,249 @@
+"""
+Analytics over the columnar findings archive
+
+Reads the Parquet dataset written by scanners/archive_writer.py. Filters on
+scan_date/account_id/service prune whole partitions, other filters are
+pushed down to the Parquet row groups, and only the columns each query
+needs are read. Aggregations run vectorized in pyarrow.compute.
+
+Marker rows (null resource_id and costs, one per scan and scanner) make
+scans without findings count in trends; per-resource queries skip them.
+
+Usage:
+    python archive_analytics.py ./archive trends --start 2026-01-01
+    python archive_analytics.py s3://bucket/archive top --account 123456789012 --limit 20
+"""
+import argparse
+import json
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+PARTITION_SCHEMA = pa.schema([
+    ('scan_date', pa.string()),
+    ('account_id', pa.string()),
+    ('service', pa.string())
+])
+
+def open_archive(archive_path):
+    """
+    Open the archive at a local path or s3:// URI as a pyarrow dataset
+    """
+    if '://' in archive_path:
+        filesystem, path = pafs.FileSystem.from_uri(archive_path)
+    else:
+        filesystem, path = pafs.LocalFileSystem(), archive_path
+
+    return ds.dataset(
+        path,
+        filesystem=filesystem,
+        format='parquet',
+        partitioning=ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+    )
+
+def build_filter(start_date=None, end_date=None, account_id=None, service=None, severity=None, resources_only=False):
+    """
+    Build a dataset filter expression from optional query arguments
+    Dates are inclusive YYYY-MM-DD strings; resources_only drops marker rows
+    """
+    conditions = []
+    if start_date:
+        conditions.append(pc.field('scan_date') >= start_date)
+    if end_date:
+        conditions.append(pc.field('scan_date') <= end_date)
+    if account_id:
+        conditions.append(pc.field('account_id') == account_id)
+    if service:
+        conditions.append(pc.field('service') == service)
+    if severity:
+        conditions.append(pc.field('severity') == severity)
+    if resources_only:
+        conditions.append(pc.field('resource_id').is_valid())
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def rename(table, mapping):
+    """
+    Rename selected columns (aggregate outputs are named <column>_<function>)
+    """
+    return table.rename_columns([mapping.get(name, name) for name in table.column_names])
+
+def latest_scan_per_day(table):
+    """
+    Reduce a per-scan aggregate table to the last scan of each day per account
+    so days with several scans are not double counted
+    """
+    latest = table.group_by(['scan_date', 'account_id']).aggregate([('scan_timestamp', 'max')])
+    return table.join(
+        rename(latest, {'scan_timestamp_max': 'scan_timestamp'}),
+        keys=['scan_date', 'account_id', 'scan_timestamp'],
+        join_type='inner'
+    )
+
+def savings_trend(archive_path, **filters):
+    """
+    Daily potential monthly savings and finding counts per service, summed across accounts
+    """
+    dataset = open_archive(archive_path)
+    table = dataset.to_table(
+        columns=['scan_date', 'scan_timestamp', 'account_id', 'service', 'monthly_cost_usd'],
+        filter=build_filter(**filters)
+    )
+    if table.num_rows == 0:
+        return []
+
+    per_scan = table.group_by(['scan_date', 'scan_timestamp', 'account_id', 'service']).aggregate([
+        ('monthly_cost_usd', 'sum'),
+        ('monthly_cost_usd', 'count')
+    ])
+    per_scan = rename(per_scan, {
+        'monthly_cost_usd_sum': 'monthly_savings_usd',
+        'monthly_cost_usd_count': 'findings'
+    })
+    # Scans with only a marker row sum to null: they found nothing
+    per_scan = per_scan.set_column(
+        per_scan.schema.get_field_index('monthly_savings_usd'),
+        'monthly_savings_usd',
+        pc.fill_null(per_scan['monthly_savings_usd'], 0.0)
+    )
+
+    # Take each account's last scan of the day, then sum across accounts
+    scan_totals = per_scan.group_by(['scan_date', 'scan_timestamp', 'account_id']).aggregate([])
+    daily = per_scan.join(
+        latest_scan_per_day(scan_totals),
+        keys=['scan_date', 'scan_timestamp', 'account_id'],
+        join_type='inner'
+    )
+    daily = daily.group_by(['scan_date', 'service']).aggregate([
+        ('monthly_savings_usd', 'sum'),
+        ('findings', 'sum')
+    ]).sort_by([('scan_date', 'ascending'), ('service', 'ascending')])
+
+    return [
+        {
+            'date': row['scan_date'],
+            'service': row['service'],
+            'monthly_savings_usd': round(row['monthly_savings_usd_sum'], 2),
+            'findings': row['findings_sum']
+        }
+        for row in daily.to_pylist()
+    ]
+
+def top_offenders(archive_path, limit=20, **filters):
+    """
+    Resources that wasted the most money over the period
+
+    Waste is estimated as the resource's monthly cost prorated over the
+    number of distinct days it was flagged.
+    """
+    dataset = open_archive(archive_path)
+    table = dataset.to_table(
+        columns=['resource_id', 'account_id', 'service', 'finding_type', 'scan_date', 'monthly_cost_usd'],
+        filter=build_filter(resources_only=True, **filters)
+    )
+    if table.num_rows == 0:
+        return []
+
+    per_resource = table.group_by(['resource_id', 'account_id', 'service', 'finding_type']).aggregate([
+        ('monthly_cost_usd', 'max'),
+        ('scan_date', 'count_distinct'),
+        ('scan_date', 'min'),
+        ('scan_date', 'max')
+    ])
+    waste = pc.divide(
+        pc.multiply(per_resource['monthly_cost_usd_max'], pc.cast(per_resource['scan_date_count_distinct'], pa.float64())),
+        30.0
+    )
+    per_resource = per_resource.append_column('estimated_waste_usd', waste)
+    top = per_resource.take(pc.select_k_unstable(
+        per_resource,
+        k=min(limit, per_resource.num_rows),
+        sort_keys=[('estimated_waste_usd', 'descending')]
+    ))
+
+    return [
+        {
+            'resource_id': row['resource_id'],
+            'account_id': row['account_id'],
+            'service': row['service'],
+            'finding_type': row['finding_type'],
+            'monthly_cost_usd': round(row['monthly_cost_usd_max'], 2),
+            'days_flagged': row['scan_date_count_distinct'],
+            'first_seen': row['scan_date_min'],
+            'last_seen': row['scan_date_max'],
+            'estimated_waste_usd': round(row['estimated_waste_usd'], 2)
+        }
+        for row in top.to_pylist()
+    ]
+
+def realized_savings(archive_path, **filters):
+    """
+    Monthly savings realized over time from resources that stopped being flagged
+
+    A resource counts as fixed on the last day it appeared, provided that day
+    is before the most recent archived scan date in the selection (marker
+    rows included, so a final scan with no findings counts).
+    """
+    dataset = open_archive(archive_path)
+    table = dataset.to_table(
+        columns=['resource_id', 'scan_date', 'monthly_cost_usd'],
+        filter=build_filter(**filters)
+    )
+    if table.num_rows == 0:
+        return []
+
+    last_date = pc.max(table['scan_date']).as_py()
+    table = table.filter(pc.field('resource_id').is_valid())
+    per_resource = table.group_by(['resource_id']).aggregate([
+        ('scan_date', 'max'),
+        ('monthly_cost_usd', 'max')
+    ])
+    fixed = per_resource.filter(pc.field('scan_date_max') < last_date)
+    by_day = fixed.group_by(['scan_date_max']).aggregate([
+        ('monthly_cost_usd_max', 'sum'),
+        ('resource_id', 'count')
+    ]).sort_by('scan_date_max')
+
+    cumulative = 0.0
+    results = []
+    for row in by_day.to_pylist():
+        cumulative += row['monthly_cost_usd_max_sum']
+        results.append({
+            'date': row['scan_date_max'],
+            'resources_fixed': row['resource_id_count'],
+            'monthly_savings_usd': round(row['monthly_cost_usd_max_sum'], 2),
+            'cumulative_monthly_savings_usd': round(cumulative, 2)
+        })
+    return results
+
+# For local analysis
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Query the cost optimizer findings archive')
+    parser.add_argument('archive_path', help='Local directory or s3:// URI of the archive')
+    parser.add_argument('query', choices=['trends', 'top', 'savings'])
+    parser.add_argument('--start', dest='start_date')
+    parser.add_argument('--end', dest='end_date')
+    parser.add_argument('--account', dest='account_id')
+    parser.add_argument('--service')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    filters = {
+        'start_date': args.start_date,
+        'end_date': args.end_date,
+        'account_id': args.account_id,
+        'service': args.service
+    }
+    if args.query == 'trends':
+        output = savings_trend(args.archive_path, **filters)
+    elif args.query == 'top':
+        output = top_offenders(args.archive_path, limit=args.limit, **filters)
+    else:
+        output = realized_savings(args.archive_path, **filters)
+
+    print(json.dumps(output, indent=2))
@@ -0,0 +1,156 @@
+"""
+Server-side filtering, sorting and top-N selection of scan findings
+Used by the findings API so the dashboard never has to load every finding
+"""
+import boto3
+import heapq
+import json
+
+# Mirrors scanners/findings_index.py: snapshot findings also carry volume_id
+RESOURCE_ID_FIELDS = ['snapshot_id', 'instance_id', 'allocation_id', 'volume_id']
+
+SEVERITY_RANK = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3}
+
+SORT_KEYS = {
+    'monthly_cost_usd': lambda f: float(f.get('monthly_cost_usd', 0)),
+    'annual_savings_usd': lambda f: float(f.get('annual_savings_usd', 0)),
+    'severity': lambda f: (SEVERITY_RANK.get(f.get('severity'), 0), float(f.get('monthly_cost_usd', 0))),
+    'service': lambda f: (f.get('service') or '', f.get('finding_type') or ''),
+    'resource_id': lambda f: f.get('resource_id') or ''
+}
+
+FILTER_PARAMS = ['severity', 'service', 'finding_type', 'min_cost', 'sort', 'order', 'top']
+
+def get_resource_id(finding):
+    """Return the AWS resource ID a finding refers to, or None"""
+    for field in RESOURCE_ID_FIELDS:
+        value = finding.get(field)
+        if value and value != 'N/A':
+            return value
+    return None
+
+def parse_query(query_params):
+    """
+    Parse findings query parameters
+
+    severity/service/finding_type accept comma-separated values, min_cost is
+    a minimum monthly_cost_usd, sort is one of SORT_KEYS, order is asc/desc
+    and top limits the result to the first N findings.
+    Raises ValueError for invalid values.
+    """
+    def values(name):
+        raw = query_params.get(name)
+        return {v.strip() for v in raw.split(',') if v.strip()} if raw else None
+
+    sort = query_params.get('sort', 'monthly_cost_usd')
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+
+    order = query_params.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError('order must be asc or desc')
+
+    top = int(query_params['top']) if query_params.get('top') else None
+    if top is not None and top < 1:
+        raise ValueError('top must be a positive integer')
+
+    return {
+        'severity': {v.upper() for v in values('severity')} if values('severity') else None,
+        'service': values('service'),
+        'finding_type': values('finding_type'),
+        'min_cost': float(query_params['min_cost']) if query_params.get('min_cost') else None,
+        'sort': sort,
+        'order': order,
+        'top': top
+    }
+
+def matches(finding, query):
+    """Check a flattened finding against the query filters"""
+    if query['severity'] and finding.get('severity') not in query['severity']:
+        return False
+    if query['service'] and finding.get('service') not in query['service']:
+        return False
+    if query['finding_type'] and finding.get('finding_type') not in query['finding_type']:
+        return False
+    if query['min_cost'] is not None and float(finding.get('monthly_cost_usd', 0)) < query['min_cost']:
+        return False
+    return True
+
+def iter_report_findings(location, scanner_name):
+    """
+    Stream one scanner's findings from the NDJSON report on S3
+    Mirrors scanners/report_writer.py; the report holds all of the
+    scanner's findings, including the ones kept inline
+    """
+    if not location.startswith('s3://'):
+        # Local reports are not reachable from the API
+        raise ValueError(f"Findings report is not on S3: {location}")
+    bucket, _, key = location[len('s3://'):].partition('/')
+    body = boto3.client('s3').get_object(Bucket=bucket, Key=key)['Body']
+    for line in body.iter_lines():
+        if line.strip():
+            entry = json.loads(line)
+            if entry['scanner'] == scanner_name:
+                yield entry['finding']
+
+def iter_flat_findings(detailed_results):
+    """Yield every finding with its scanner's service/finding_type and resource ID"""
+    for result in detailed_results:
+        if result.get('findings_truncated'):
+            findings = iter_report_findings(result['findings_location'], result['scanner'])
+        else:
+            findings = result.get('findings', [])
+        for finding in findings:
+            yield {
+                **finding,
+                'service': result.get('service', 'Unknown'),
+                'finding_type': result.get('finding_type', 'Unknown'),
+                'resource_id': get_resource_id(finding)
+            }
+
+def select_findings(findings, query):
+    """
+    Filter and sort an iterable of flattened findings
+
+    In top-N mode only N findings are kept in a heap while streaming, so the
+    full filtered list is never materialized. Returns (findings, matched)
+    where matched is None in top-N mode.
+    """
+    key = SORT_KEYS[query['sort']]
+    matching = (f for f in findings if matches(f, query))
+
+    if query['top']:
+        pick = heapq.nlargest if query['order'] == 'desc' else heapq.nsmallest
+        return pick(query['top'], matching, key=key), None
+
+    selected = sorted(matching, key=key, reverse=(query['order'] == 'desc'))
+    return selected, len(selected)
+
+def query_scan_findings(scan_item, query, load_detailed_results=None):
+    """
+    Answer a findings query for a stored scan item
+
+    Top-N queries by descending monthly cost are served from the scan's
+    pre-sorted top_findings when it holds enough matches, without decoding
+    detailed_results. If scan_item was read without detailed_results,
+    load_detailed_results() fetches them only for the other queries.
+    Returns (findings, matched, source).
+    """
+    top = query['top']
+    if top and query['sort'] == 'monthly_cost_usd' and query['order'] == 'desc' and scan_item.get('top_findings'):
+        presorted = json.loads(scan_item['top_findings'])
+        candidates = [f for f in presorted if matches(f, query)]
+        # Complete when the stored list holds every finding of the scan
+        complete = len(presorted) >= int(scan_item.get('total_findings', 0))
+        if len(candidates) >= top or complete:
+            return candidates[:top], (len(candidates) if complete else None), 'precomputed'
+
+    if load_detailed_results is not None:
+        detailed_results = load_detailed_results()
+    else:
+        detailed_results = scan_item.get('detailed_results', [])
+    if isinstance(detailed_results, str):
+        detailed_results = json.loads(detailed_results)
+
+    findings, matched = select_findings(iter_flat_findings(detailed_results), query)
+    return findings, matched, 'detailed_results'
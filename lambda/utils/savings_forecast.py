@@ -0,0 +1,222 @@
+"""
+Savings forecasts and anomaly detection over the pre-aggregated scan history
+
+Reads the per account/service daily series written by
+scanners/scan_history.py and analyzes all of them at once with NumPy: series are stacked into
+right-aligned, NaN-padded matrices so the trend fit and anomaly scores
+are single vectorized passes instead of per-series loops.
+
+Requires numpy (not in the Lambda runtime - ship it as a layer).
+"""
+import boto3
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SCAN_HISTORY_TABLE = 'cost-optimizer-scan-history'
+
+# Mirrors scanners/scan_history.py: service name of the per-account total series
+ALL_SERVICES = 'ALL'
+
+FORECAST_HORIZONS_DAYS = [30, 90]
+
+DAYS_PER_MONTH = 30.4375
+
+# Points needed before a trend is fitted
+MIN_TREND_POINTS = 3
+
+# Previous day-to-day changes needed before the latest one is scored
+MIN_ANOMALY_HISTORY = 5
+
+# Robust z-score above which the latest change is flagged
+ANOMALY_THRESHOLD = 3.5
+
+# Smallest change worth flagging, per metric; also the smallest spread
+# changes are scored against, so a flat history does not turn every
+# change into an infinite score
+MIN_ANOMALY_CHANGE = {'findings': 3, 'savings': 10.0}
+
+def load_series(dynamodb=None):
+    """
+    Read every history series (one small item per account/service)
+    """
+    dynamodb = dynamodb or boto3.resource('dynamodb')
+    table = dynamodb.Table(SCAN_HISTORY_TABLE)
+    items = []
+    kwargs = {}
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def scan_breakdown(items, scan_id):
+    """
+    Findings and monthly savings per service of one scan, read from the
+    latest point of every series that scan updated last
+    """
+    return [
+        {
+            'service': item.get('service'),
+            'findings': int(item['findings'][-1]),
+            'monthly_savings_usd': round(float(item['savings'][-1]), 2)
+        }
+        for item in items
+        if item.get('last_scan_id') == scan_id and item.get('service') != ALL_SERVICES and item.get('timestamps')
+    ]
+
+def drop_stale_series(items):
+    """
+    Keep only the series whose latest point is from the most recent day
+
+    A service that no longer shows up in scans (or an account that is no
+    longer scanned) keeps its old points; right-aligned next to current
+    series they would pass for today's values and report their last
+    anomaly on every call.
+    """
+    newest = max(item['timestamps'][-1][:10] for item in items)
+    return [item for item in items if item['timestamps'][-1][:10] == newest]
+
+def stack_series(items, field):
+    """
+    Stack one metric of all series into right-aligned (series x points) matrices
+
+    Returns (days, values): days since each series' first point and the
+    metric values, NaN where a series is shorter than the longest one, so
+    column -1 always holds the latest scan.
+    """
+    width = max(len(item.get('timestamps', [])) for item in items)
+    days = np.full((len(items), width), np.nan)
+    values = np.full((len(items), width), np.nan)
+
+    for row, item in enumerate(items):
+        stamps = np.array(item.get('timestamps', []), dtype='datetime64[s]')
+        if not len(stamps):
+            continue
+        offset = width - len(stamps)
+        days[row, offset:] = (stamps - stamps[0]) / np.timedelta64(1, 'D')
+        values[row, offset:] = np.array(item[field], dtype=float)
+    return days, values
+
+def fit_trends(days, values):
+    """
+    Least-squares line per row, ignoring NaN padding
+    Returns (slope per day, intercept, points); rows without enough
+    points or time spread get a flat line through their mean
+    """
+    present = ~np.isnan(values)
+    points = present.sum(axis=1)
+    count = np.maximum(points, 1)
+
+    x = np.where(present, days, 0.0)
+    y = np.where(present, values, 0.0)
+    mean_x = x.sum(axis=1) / count
+    mean_y = y.sum(axis=1) / count
+    dx = np.where(present, days - mean_x[:, None], 0.0)
+    dy = np.where(present, values - mean_y[:, None], 0.0)
+
+    sxx = (dx * dx).sum(axis=1)
+    sxy = (dx * dy).sum(axis=1)
+    fitted = (points >= MIN_TREND_POINTS) & (sxx > 0)
+    slope = np.where(fitted, sxy / np.where(sxx > 0, sxx, 1.0), 0.0)
+    intercept = mean_y - slope * mean_x
+    return slope, intercept, points
+
+def forecast_savings(items):
+    """
+    Project each series' monthly savings FORECAST_HORIZONS_DAYS ahead
+
+    forecast_<n>d is the projected monthly savings level n days after the
+    latest scan; waste_next_<n>d the cost accrued over those n days if
+    nothing is remediated.
+    """
+    days, values = stack_series(items, 'savings')
+    slope, intercept, points = fit_trends(days, values)
+    latest_day = days[:, -1]
+    latest = values[:, -1]
+
+    projections = {}
+    for horizon in FORECAST_HORIZONS_DAYS:
+        level = np.maximum(intercept + slope * (latest_day + horizon), 0)
+        average = np.maximum(intercept + slope * (latest_day + horizon / 2), 0)
+        projections[horizon] = (level, average * horizon / DAYS_PER_MONTH)
+
+    forecasts = []
+    for row, item in enumerate(items):
+        forecast = {
+            'account_id': item.get('account_id'),
+            'service': item.get('service'),
+            'points': int(points[row]),
+            'current_monthly_savings_usd': round(float(latest[row]), 2),
+            'trend_usd_per_month': round(float(slope[row] * DAYS_PER_MONTH), 2)
+        }
+        for horizon, (level, waste) in projections.items():
+            forecast[f"forecast_{horizon}d_monthly_savings_usd"] = round(float(level[row]), 2)
+            forecast[f"waste_next_{horizon}d_usd"] = round(float(waste[row]), 2)
+        forecasts.append(forecast)
+    return forecasts
+
+def detect_anomalies(items, field):
+    """
+    Flag series whose latest day-to-day change in a metric is a spike
+
+    The change is scored against the series' earlier changes with a robust
+    z-score (median / median absolute deviation, floored at the metric's
+    MIN_ANOMALY_CHANGE).
+    """
+    _, values = stack_series(items, field)
+    if values.shape[1] < MIN_ANOMALY_HISTORY + 2:
+        return []
+
+    changes = np.diff(values, axis=1)
+    latest = changes[:, -1]
+    previous = changes[:, :-1]
+
+    history = (~np.isnan(previous)).sum(axis=1)
+    scored = (history >= MIN_ANOMALY_HISTORY) & ~np.isnan(latest)
+    if not scored.any():
+        return []
+
+    previous = previous[scored]
+    median = np.nanmedian(previous, axis=1)
+    mad = np.maximum(np.nanmedian(np.abs(previous - median[:, None]), axis=1), MIN_ANOMALY_CHANGE[field])
+    deviation = latest[scored] - median
+    z = 0.6745 * deviation / mad
+    flagged = (np.abs(z) > ANOMALY_THRESHOLD) & (np.abs(deviation) >= MIN_ANOMALY_CHANGE[field])
+
+    rows = np.flatnonzero(scored)
+    anomalies = []
+    for index in np.flatnonzero(flagged):
+        item = items[rows[index]]
+        anomalies.append({
+            'account_id': item.get('account_id'),
+            'service': item.get('service'),
+            'metric': field,
+            'direction': 'spike' if deviation[index] > 0 else 'drop',
+            'change': round(float(latest[scored][index]), 2),
+            'typical_change': round(float(median[index]), 2),
+            'score': round(float(z[index]), 1),
+            'timestamp': item['timestamps'][-1]
+        })
+    return anomalies
+
+def analyze_history(items):
+    """
+    Forecasts and anomalies for a list of history series
+    Series not updated on the most recent day are left out
+    """
+    if np is None:
+        raise RuntimeError('numpy is required for forecasting (pip install numpy)')
+
+    items = [item for item in items if item.get('timestamps')]
+    if not items:
+        return {'forecasts': [], 'anomalies': []}
+    items = drop_stale_series(items)
+
+    return {
+        'forecasts': forecast_savings(items),
+        'anomalies': detect_anomalies(items, 'findings') + detect_anomalies(items, 'savings')
+    }
@@ -0,0 +1,62 @@
+"""
+Reading cost-optimizer-scans without loading every scan
+
+The master scanner keeps a pointer item at the latest scan, so the latest
+scan is two get_item calls however many scans are stored. Table scans are
+paginated (every page is at most 1 MB) and skip the pointer item.
+"""
+from boto3.dynamodb.conditions import Attr
+
+# Mirrors scanners/scan_scheduler.py: the pointer item the master scanner writes after every scan
+LATEST_SCAN_KEY = {'scan_id': 'LATEST'}
+
+def scan_items(table, projection=None, names=None, filter_expression=None):
+    """
+    Every scan item (not the pointer), following LastEvaluatedKey
+    """
+    condition = Attr('scan_id').ne(LATEST_SCAN_KEY['scan_id'])
+    if filter_expression is not None:
+        condition = condition & filter_expression
+    kwargs = {'FilterExpression': condition}
+    if projection:
+        kwargs['ProjectionExpression'] = projection
+    if names:
+        kwargs['ExpressionAttributeNames'] = names
+
+    items = []
+    while True:
+        response = table.scan(**kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def find_latest_scan_id(table):
+    """
+    scan_id of the most recent scan, or None if there are none
+    Falls back to scanning the keys for tables written before the pointer existed
+    """
+    pointer = table.get_item(Key=LATEST_SCAN_KEY).get('Item')
+    if pointer:
+        return pointer['latest_scan_id']
+
+    items = scan_items(table, 'scan_id, #ts', {'#ts': 'timestamp'})
+    if not items:
+        return None
+    return max(items, key=lambda x: x.get('timestamp', ''))['scan_id']
+
+def count_scans(table):
+    """
+    Number of scan items (not the pointer), counted page by page
+    """
+    kwargs = {
+        'Select': 'COUNT',
+        'FilterExpression': Attr('scan_id').ne(LATEST_SCAN_KEY['scan_id'])
+    }
+    count = 0
+    while True:
+        response = table.scan(**kwargs)
+        count += response.get('Count', 0)
+        if 'LastEvaluatedKey' not in response:
+            return count
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { DollarSign, TrendingDown, AlertTriangle, RefreshCw, Play, Download, Sparkles, TrendingUp, Server, Database } from 'lucide-react';
 import { PieChart, Pie, Cell, LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, AreaChart, Area } from 'recharts';
 import apiService from './services/api';
-import { SEVERITY_COLORS, SERVICE_COLORS } from './config';
+import { SEVERITY_COLORS, SERVICE_COLORS, FINDINGS_PAGE_SIZE } from './config';
 import './App.css';
 
 function App() {
@@ -290,7 +290,12 @@ function App() {
         </div>
 
         {/* Findings Table */}
-        {latest?.detailed_results && <FindingsTable results={latest.detailed_results} />}
+        {latest && (
+          <FindingsTable
+            scanId={latest.scan_id}
+            services={(summary.service_breakdown || []).map(s => s.service)}
+          />
+        )}
 
         {/* Scan History */}
         <ScanHistory scans={scans} />
@@ -343,28 +348,27 @@ function InsightCard({ insight }) {
 }
 
 // Enhanced Findings Table
-function FindingsTable({ results }) {
+function FindingsTable({ scanId, services }) {
   const [filter, setFilter] = useState('all');
   const [search, setSearch] = useState('');
+  const [findings, setFindings] = useState([]);
 
-  const allFindings = results.flatMap(service =>
-    (service.findings || []).map(f => ({
-      ...f,
-      service: service.service,
-      finding_type: service.finding_type
-    }))
-  );
+  // Service filtering, sorting and top-N run server-side
+  useEffect(() => {
+    const params = { sort: 'monthly_cost_usd', order: 'desc', top: FINDINGS_PAGE_SIZE };
+    if (filter !== 'all') params.service = filter;
 
-  const filtered = allFindings.filter(f => {
-    const matchesFilter = filter === 'all' || f.service === filter;
-    const matchesSearch = search === '' || 
-      Object.values(f).some(v => 
-        String(v).toLowerCase().includes(search.toLowerCase())
-      );
-    return matchesFilter && matchesSearch;
-  });
+    apiService.getFindings(params)
+      .then(data => setFindings(data.findings || []))
+      .catch(() => setFindings([]));
+  }, [filter, scanId]);
 
-  const services = [...new Set(results.map(r => r.service))];
+  const filtered = findings.filter(f =>
+    search === '' ||
+    Object.values(f).some(v =>
+      String(v).toLowerCase().includes(search.toLowerCase())
+    )
+  );
 
   return (
     <div className="bg-white/5 backdrop-blur-lg rounded-2xl border border-white/10 p-6 mb-8 shadow-2xl">
@@ -411,7 +415,7 @@ function FindingsTable({ results }) {
               <tr key={idx} className="hover:bg-white/5 transition-colors duration-150">
                 <td className="px-4 py-3 text-sm text-white">{f.service}</td>
                 <td className="px-4 py-3 text-sm font-mono text-xs text-purple-300">
-                  {f.volume_id || f.instance_id || f.allocation_id || f.snapshot_id}
+                  {f.resource_id || f.volume_id || f.instance_id || f.allocation_id || f.snapshot_id}
                 </td>
                 <td className="px-4 py-3 text-sm text-white">{f.finding_type}</td>
                 <td className="px-4 py-3 text-sm text-right text-white">${f.monthly_cost_usd?.toFixed(2)}</td>
@@ -9,6 +9,11 @@ export const API_ENDPOINTS = {
   triggerScan: `${API_BASE_URL}/scan`
 };
 
+// Max findings the dashboard requests at once (most expensive first)
+// Matches TOP_FINDINGS_COUNT in lambda/scanners/findings_index.py so the
+// API can answer from each scan's precomputed top findings
+export const FINDINGS_PAGE_SIZE = 200;
+
 export const SEVERITY_COLORS = {
   HIGH: '#ef4444',
   MEDIUM: '#f59e0b',
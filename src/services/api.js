@@ -25,6 +25,20 @@ class ApiService {
     }
   }
 
+  // params: severity, service, finding_type, min_cost, sort, order, top
+  async getFindings(params = {}) {
+    try {
+      const response = await this.client.get(API_ENDPOINTS.latest, { params });
+      if (response.data.success) {
+        return response.data.data;
+      }
+      throw new Error(response.data.error || 'Failed to fetch findings');
+    } catch (error) {
+      console.error('Error fetching findings:', error);
+      throw error;
+    }
+  }
+
   async getScans(limit = 10, sort = 'desc') {
     try {
       const response = await this.client.get(API_ENDPOINTS.scans, {
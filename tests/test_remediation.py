@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'scanners'))
+
+import remediation
+
+def make_ec2():
+    return boto3.client(
+        'ec2',
+        region_name='us-east-1',
+        aws_access_key_id='testing',
+        aws_secret_access_key='testing'
+    )
+
+def make_action(action, resource_id, monthly_cost=8.0):
+    return {
+        'action_id': f"{action}:{resource_id}",
+        'action': action,
+        'resource_id': resource_id,
+        'service': 'EBS',
+        'monthly_cost_usd': monthly_cost
+    }
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """Record retry back-off sleeps instead of waiting"""
+    sleeps = []
+    monkeypatch.setattr(remediation.time, 'sleep', sleeps.append)
+    return sleeps
+
+def test_dry_run_operation_is_dry_run_ok(no_sleep):
+    ec2 = make_ec2()
+    with Stubber(ec2) as stubber:
+        stubber.add_client_error(
+            'delete_volume',
+            service_error_code='DryRunOperation',
+            http_status_code=412,
+            expected_params={'VolumeId': 'vol-1', 'DryRun': True}
+        )
+        entry = remediation.execute_action(
+            ec2, make_action('delete_volume', 'vol-1'), True, remediation.RateLimiter(1000)
+        )
+        stubber.assert_no_pending_responses()
+
+    assert entry['status'] == 'dry_run_ok'
+    assert entry['attempts'] == 1
+
+def test_not_found_is_already_gone(no_sleep):
+    ec2 = make_ec2()
+    with Stubber(ec2) as stubber:
+        stubber.add_client_error(
+            'delete_snapshot',
+            service_error_code='InvalidSnapshot.NotFound',
+            http_status_code=400,
+            expected_params={'SnapshotId': 'snap-1', 'DryRun': False}
+        )
+        entry = remediation.execute_action(
+            ec2, make_action('delete_snapshot', 'snap-1'), False, remediation.RateLimiter(1000)
+        )
+
+    assert entry['status'] == 'already_gone'
+    assert 'error' not in entry
+
+def test_throttling_is_retried(no_sleep):
+    ec2 = make_ec2()
+    with Stubber(ec2) as stubber:
+        for _ in range(2):
+            stubber.add_client_error(
+                'release_address',
+                service_error_code='RequestLimitExceeded',
+                http_status_code=503,
+                expected_params={'AllocationId': 'eipalloc-1', 'DryRun': False}
+            )
+        stubber.add_response('release_address', {}, {'AllocationId': 'eipalloc-1', 'DryRun': False})
+        entry = remediation.execute_action(
+            ec2, make_action('release_address', 'eipalloc-1'), False, remediation.RateLimiter(1000)
+        )
+        stubber.assert_no_pending_responses()
+
+    assert entry['status'] == 'succeeded'
+    assert entry['attempts'] == 3
+    assert [s for s in no_sleep if s >= 0.2] == [0.2, 0.4]
+
+def test_throttling_gives_up_after_max_attempts(no_sleep):
+    ec2 = make_ec2()
+    with Stubber(ec2) as stubber:
+        for _ in range(remediation.MAX_ATTEMPTS):
+            stubber.add_client_error('delete_volume', service_error_code='Throttling', http_status_code=400)
+        entry = remediation.execute_action(
+            ec2, make_action('delete_volume', 'vol-1'), False, remediation.RateLimiter(1000)
+        )
+
+    assert entry['status'] == 'failed'
+    assert entry['attempts'] == remediation.MAX_ATTEMPTS
+    assert entry['error'].startswith('Throttling')
+
+def test_resume_skips_completed_actions(tmp_path, no_sleep):
+    ledger_path = str(tmp_path / 'ledger.jsonl')
+    done = make_action('delete_volume', 'vol-done')
+    failed = make_action('delete_volume', 'vol-failed')
+    pending = make_action('delete_volume', 'vol-pending')
+    with open(ledger_path, 'w') as f:
+        f.write(json.dumps({**done, 'dry_run': False, 'status': 'succeeded'}) + '\n')
+        f.write(json.dumps({**failed, 'dry_run': False, 'status': 'failed'}) + '\n')
+        # Completed in a dry run only, so still due for real
+        f.write(json.dumps({**pending, 'dry_run': True, 'status': 'dry_run_ok'}) + '\n')
+
+    ec2 = make_ec2()
+    with Stubber(ec2) as stubber:
+        # Only the two unfinished actions reach the API; max_workers=1 keeps their order
+        stubber.add_response('delete_volume', {}, {'VolumeId': 'vol-failed', 'DryRun': False})
+        stubber.add_response('delete_volume', {}, {'VolumeId': 'vol-pending', 'DryRun': False})
+        summary = remediation.run_remediation(
+            [done, failed, pending], ec2, ledger_path, dry_run=False, max_workers=1
+        )
+        stubber.assert_no_pending_responses()
+
+    assert summary['skipped_completed'] == 1
+    assert summary['status_counts'] == {'succeeded': 2}
+    assert summary['monthly_savings_realized_usd'] == 16.0
+    assert remediation.load_checkpoint(ledger_path, False) == {
+        done['action_id'], failed['action_id'], pending['action_id']
+    }
+
+def test_unknown_actions_are_rejected(tmp_path, capsys):
+    report = tmp_path / 'report.json'
+    report.write_text(json.dumps({'detailed_results': [], 'region': 'us-east-1'}))
+
+    with pytest.raises(SystemExit) as exc:
+        remediation.main(['--report', str(report), '--actions', 'delete_volume,delete_everything'])
+
+    assert exc.value.code == 2
+    assert 'delete_everything' in capsys.readouterr().err
@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'scanners'))
+
+import report_writer
+from findings_index import RunningTopFindings
+
+SOURCE = {'service': 'EBS', 'finding_type': 'Unattached Volumes'}
+
+def make_finding(volume_id, monthly_cost):
+    return {'volume_id': volume_id, 'monthly_cost_usd': monthly_cost}
+
+def test_rollback_drops_lines_since_mark(tmp_path):
+    writer = report_writer.NdjsonReportWriter('scan_1', str(tmp_path))
+    writer.write('EBS Volumes', make_finding('vol-1', 1.0))
+    mark = writer.mark()
+    writer.write('EC2 Instances', make_finding('vol-2', 2.0))
+    writer.write('EC2 Instances', make_finding('vol-3', 3.0))
+    writer.rollback(mark)
+    writer.write('Elastic IPs', make_finding('vol-4', 4.0))
+    location = writer.close()
+
+    assert writer.count == 2
+    assert [entry['scanner'] for entry in report_writer.iter_report_lines(location)] == ['EBS Volumes', 'Elastic IPs']
+
+def test_remove_spool_keeps_local_reports(tmp_path):
+    writer = report_writer.NdjsonReportWriter('scan_1', str(tmp_path))
+    location = writer.close()
+    writer.remove_spool()
+
+    assert os.path.exists(location)
+
+def test_merge_keeps_the_most_expensive():
+    top = RunningTopFindings(2)
+    top.add(SOURCE, make_finding('vol-1', 5.0))
+    scanner_top = RunningTopFindings(2)
+    scanner_top.add(SOURCE, make_finding('vol-2', 1.0))
+    scanner_top.add(SOURCE, make_finding('vol-3', 5.0))
+    scanner_top.add(SOURCE, make_finding('vol-4', 9.0))
+    top.merge(scanner_top)
+
+    # vol-1 was seen first, so it wins the tie with vol-3
+    assert [f['volume_id'] for f in top.findings()] == ['vol-4', 'vol-1']
@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+from utils import savings_forecast
+
+def make_series(service, days, findings, savings, last_scan_id='scan_2'):
+    return {
+        'series': f"default#{service}",
+        'account_id': 'default',
+        'service': service,
+        'last_scan_id': last_scan_id,
+        'timestamps': [f"2026-10-{day:02d}T09:00:00" for day in days],
+        'findings': findings,
+        'savings': savings
+    }
+
+def test_stale_series_are_dropped():
+    current = make_series('EBS', [18, 19], [2, 3], [10, 12])
+    stale = make_series('RDS', [10, 11], [1, 1], [5, 5], last_scan_id='scan_1')
+
+    assert savings_forecast.drop_stale_series([current, stale]) == [current]
+
+def test_stale_anomaly_is_not_reported():
+    # Spike on the stale series' last day; it must not look like today's spike
+    days = list(range(1, 11))
+    stale = make_series('RDS', days, [1] * 9 + [50], [1.0] * 9 + [900.0], last_scan_id='scan_1')
+    current = make_series('EBS', [day + 5 for day in days], [2] * 10, [10.0] * 10)
+
+    analysis = savings_forecast.analyze_history([stale, current])
+
+    assert analysis['anomalies'] == []
+    assert [f['service'] for f in analysis['forecasts']] == ['EBS']
+
+def test_scan_breakdown_uses_series_of_the_scan():
+    items = [
+        make_series('ALL', [19], [5], [22]),
+        make_series('EBS', [19], [2], [10]),
+        make_series('EC2', [19], [3], [12]),
+        make_series('RDS', [11], [1], [5], last_scan_id='scan_1')
+    ]
+
+    assert savings_forecast.scan_breakdown(items, 'scan_2') == [
+        {'service': 'EBS', 'findings': 2, 'monthly_savings_usd': 10.0},
+        {'service': 'EC2', 'findings': 3, 'monthly_savings_usd': 12.0}
+    ]
@@ -0,0 +1,94 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda', 'scanners'))
+
+import scan_scheduler
+
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+INTERVALS = {'Elastic IPs': 1, 'EC2 Instances': 24}
+
+def make_run(hours_ago, cost=0.0, status='succeeded'):
+    return {
+        'last_run': (NOW - timedelta(hours=hours_ago)).isoformat(),
+        'status': status,
+        'result': '{"total_findings": 0}',
+        'estimated_api_cost_usd': cost
+    }
+
+def test_never_run_is_due():
+    assert scan_scheduler.is_due('EC2 Instances', None, NOW, INTERVALS)
+
+def test_failed_run_is_due():
+    assert scan_scheduler.is_due('EC2 Instances', make_run(1, status='failed'), NOW, INTERVALS)
+
+def test_due_once_interval_elapsed():
+    assert not scan_scheduler.is_due('EC2 Instances', make_run(23), NOW, INTERVALS)
+    assert scan_scheduler.is_due('EC2 Instances', make_run(24), NOW, INTERVALS)
+
+def test_unknown_scanner_defaults_to_daily():
+    assert not scan_scheduler.is_due('Other', make_run(23), NOW, {})
+    assert scan_scheduler.is_due('Other', make_run(24), NOW, {})
+
+def test_fresh_scanners_are_reused():
+    runs = {'Elastic IPs': make_run(2), 'EC2 Instances': make_run(2)}
+    to_run, reuse, postponed = scan_scheduler.plan_scanners(
+        ['Elastic IPs', 'EC2 Instances'], runs, NOW, INTERVALS
+    )
+
+    assert to_run == ['Elastic IPs']
+    assert reuse == ['EC2 Instances']
+    assert postponed == []
+
+def test_budget_postpones_expensive_scanner():
+    runs = {'Elastic IPs': make_run(1.5), 'EC2 Instances': make_run(30, cost=0.5)}
+    to_run, reuse, postponed = scan_scheduler.plan_scanners(
+        ['EC2 Instances', 'Elastic IPs'], runs, NOW, INTERVALS, budget_usd=0.1
+    )
+
+    assert to_run == ['Elastic IPs']
+    assert reuse == ['EC2 Instances']
+    assert postponed == ['EC2 Instances']
+
+def test_budget_never_starves_overdue_scanner():
+    # Nine days overdue: the cheap, always-due scanner must not keep it postponed
+    runs = {'Elastic IPs': make_run(1.5), 'EC2 Instances': make_run(24 * 10, cost=0.5)}
+    to_run, reuse, postponed = scan_scheduler.plan_scanners(
+        ['EC2 Instances', 'Elastic IPs'], runs, NOW, INTERVALS, budget_usd=0.1
+    )
+
+    assert to_run == ['EC2 Instances', 'Elastic IPs']
+    assert reuse == []
+    assert postponed == []
+
+def test_postponed_scanner_runs_after_one_interval():
+    runs = {'Elastic IPs': make_run(1.5), 'EC2 Instances': make_run(47, cost=0.5)}
+    assert scan_scheduler.plan_scanners(
+        ['EC2 Instances', 'Elastic IPs'], runs, NOW, INTERVALS, budget_usd=0.1
+    )[2] == ['EC2 Instances']
+
+    runs['EC2 Instances'] = make_run(48, cost=0.5)
+    assert scan_scheduler.plan_scanners(
+        ['EC2 Instances', 'Elastic IPs'], runs, NOW, INTERVALS, budget_usd=0.1
+    )[2] == []
+
+def test_first_due_scanner_always_runs():
+    runs = {'EC2 Instances': make_run(30, cost=0.5)}
+    to_run, _, postponed = scan_scheduler.plan_scanners(
+        ['EC2 Instances'], runs, NOW, INTERVALS, budget_usd=0.1
+    )
+
+    assert to_run == ['EC2 Instances']
+    assert postponed == []
+
+def test_force_runs_every_scanner():
+    runs = {'Elastic IPs': make_run(0), 'EC2 Instances': make_run(0, cost=0.5)}
+    to_run, reuse, postponed = scan_scheduler.plan_scanners(
+        ['EC2 Instances', 'Elastic IPs'], runs, NOW, INTERVALS, force=True
+    )
+
+    assert sorted(to_run) == ['EC2 Instances', 'Elastic IPs']
+    assert reuse == []
+    assert postponed == []